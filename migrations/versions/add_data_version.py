@@ -0,0 +1,33 @@
+"""Add data_version table
+
+Revision ID: add_data_version
+Revises: add_tenant_indexes
+Create Date: 2026-10-18 10:00:00.000000
+
+- Per-user, per-resource change counter used to build ETags for the
+  list endpoints
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_data_version'
+down_revision = 'add_tenant_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_version',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('resource', sa.String(length=20), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'resource')
+    )
+
+
+def downgrade():
+    op.drop_table('data_version')
@@ -0,0 +1,47 @@
+"""Add spatial index for fields
+
+Revision ID: add_field_spatial_index
+Revises: add_maintenance_index
+Create Date: 2026-10-18 15:00:00.000000
+
+- SQLite: field_rtree R-tree virtual table kept in sync by triggers on
+  field, populated from existing rows
+- All dialects: (user_id, latitude) index used as a latitude band scan
+  where no R-tree is available
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_field_spatial_index'
+down_revision = 'add_maintenance_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_field_user_id_latitude', 'field', ['user_id', 'latitude'], unique=False)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("CREATE VIRTUAL TABLE field_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon, +user_id)")
+    op.execute("CREATE TRIGGER field_rtree_ai AFTER INSERT ON field "
+               "WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN "
+               "INSERT INTO field_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude, new.user_id); END")
+    op.execute("CREATE TRIGGER field_rtree_au AFTER UPDATE OF latitude, longitude, user_id ON field BEGIN "
+               "DELETE FROM field_rtree WHERE id = old.id; "
+               "INSERT INTO field_rtree SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude, new.user_id "
+               "WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL; END")
+    op.execute("CREATE TRIGGER field_rtree_ad AFTER DELETE ON field BEGIN "
+               "DELETE FROM field_rtree WHERE id = old.id; END")
+    op.execute("INSERT INTO field_rtree SELECT id, latitude, latitude, longitude, longitude, user_id "
+               "FROM field WHERE latitude IS NOT NULL AND longitude IS NOT NULL")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for suffix in ('ai', 'au', 'ad'):
+            op.execute(f"DROP TRIGGER IF EXISTS field_rtree_{suffix}")
+        op.execute("DROP TABLE IF EXISTS field_rtree")
+    op.drop_index('ix_field_user_id_latitude', table_name='field')
@@ -0,0 +1,41 @@
+"""Add indexes for list filters and sorting
+
+Revision ID: add_filter_indexes
+Revises: add_data_version
+Create Date: 2026-10-18 11:00:00.000000
+
+- (user_id, name) on every tenant table for ?sort=name
+- (user_id, status) / (user_id, category) for the most common filters
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_filter_indexes'
+down_revision = 'add_data_version'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_field_user_id_name', 'field', ['user_id', 'name']),
+    ('ix_field_user_id_status', 'field', ['user_id', 'status']),
+    ('ix_inventory_user_id_name', 'inventory', ['user_id', 'name']),
+    ('ix_inventory_user_id_category', 'inventory', ['user_id', 'category']),
+    ('ix_equipment_user_id_name', 'equipment', ['user_id', 'name']),
+    ('ix_equipment_user_id_status', 'equipment', ['user_id', 'status']),
+    ('ix_staff_user_id_name', 'staff', ['user_id', 'name']),
+    ('ix_staff_user_id_status', 'staff', ['user_id', 'status']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
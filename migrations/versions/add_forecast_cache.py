@@ -0,0 +1,32 @@
+"""Add forecast_cache table
+
+Revision ID: add_forecast_cache
+Revises: add_geocode_cache
+Create Date: 2026-10-18 16:30:00.000000
+
+- Last Open-Meteo forecast per rounded-coordinate cell, shared by all
+  workers
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_forecast_cache'
+down_revision = 'add_geocode_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('forecast_cache',
+        sa.Column('key', sa.String(length=40), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('forecast_cache')
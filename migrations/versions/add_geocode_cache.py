@@ -0,0 +1,36 @@
+"""Add geocode_cache table
+
+Revision ID: add_geocode_cache
+Revises: add_field_spatial_index
+Create Date: 2026-10-18 16:00:00.000000
+
+- Persistent geocoding results keyed by normalized city name, including
+  names the geocoder could not find
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_geocode_cache'
+down_revision = 'add_field_spatial_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('geocode_cache',
+        sa.Column('key', sa.String(length=120), nullable=False),
+        sa.Column('found', sa.Boolean(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('country', sa.String(length=80), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('geocode_cache')
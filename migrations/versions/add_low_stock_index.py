@@ -0,0 +1,32 @@
+"""Add partial index for low-stock inventory
+
+Revision ID: add_low_stock_index
+Revises: add_filter_indexes
+Create Date: 2026-10-18 12:00:00.000000
+
+- Partial index on inventory (user_id, id) covering only the rows whose
+  quantity is at or below their min_quantity, so the low-stock queries
+  cost O(alerts) instead of O(inventory)
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_low_stock_index'
+down_revision = 'add_filter_indexes'
+branch_labels = None
+depends_on = None
+
+
+LOW_STOCK_SQL = 'min_quantity > 0 AND quantity <= min_quantity'
+
+
+def upgrade():
+    op.create_index('ix_inventory_low_stock', 'inventory', ['user_id', 'id'], unique=False,
+                    sqlite_where=sa.text(LOW_STOCK_SQL), postgresql_where=sa.text(LOW_STOCK_SQL))
+
+
+def downgrade():
+    op.drop_index('ix_inventory_low_stock', table_name='inventory')
@@ -0,0 +1,26 @@
+"""Add equipment maintenance index
+
+Revision ID: add_maintenance_index
+Revises: add_search_index
+Create Date: 2026-10-18 14:00:00.000000
+
+- (user_id, next_maintenance) on equipment for the maintenance calendar
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_maintenance_index'
+down_revision = 'add_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_equipment_user_id_next_maintenance', 'equipment', ['user_id', 'next_maintenance'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_equipment_user_id_next_maintenance', table_name='equipment')
@@ -0,0 +1,51 @@
+"""Index the remaining list filters and normalise inventory timestamps
+
+Revision ID: add_remaining_filter_indexes
+Revises: add_forecast_cache
+Create Date: 2026-10-19 10:00:00.000000
+
+- (user_id, columna) for every filter in filters.FILTERABLE that had no
+  index yet: field crop/city, inventory supplier/unit, equipment
+  type/brand and staff position
+- On SQLite, inventory created_at/updated_at written by the old
+  server_default (CURRENT_TIMESTAMP) lack microseconds and compare as
+  different strings from the values the ORM binds, which broke keyset
+  paging by updated_at. They are rewritten in the ORM format. The server
+  default is left in place: the model now always sends the value.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_remaining_filter_indexes'
+down_revision = 'add_forecast_cache'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_field_user_id_crop', 'field', ['user_id', 'crop']),
+    ('ix_field_user_id_city', 'field', ['user_id', 'city']),
+    ('ix_inventory_user_id_supplier', 'inventory', ['user_id', 'supplier']),
+    ('ix_inventory_user_id_unit', 'inventory', ['user_id', 'unit']),
+    ('ix_equipment_user_id_type', 'equipment', ['user_id', 'type']),
+    ('ix_equipment_user_id_brand', 'equipment', ['user_id', 'brand']),
+    ('ix_staff_user_id_position', 'staff', ['user_id', 'position']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for column in ('created_at', 'updated_at'):
+            op.execute(f"UPDATE inventory SET {column} = {column} || '.000000' "
+                       f"WHERE length({column}) = 19")
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
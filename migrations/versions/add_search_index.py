@@ -0,0 +1,62 @@
+"""Add full-text search indexes
+
+Revision ID: add_search_index
+Revises: add_low_stock_index
+Create Date: 2026-10-18 13:00:00.000000
+
+- SQLite: external-content FTS5 table per resource (accent-insensitive
+  unicode61 tokenizer) plus insert/update/delete triggers, then rebuild
+- Postgres: GIN index on to_tsvector('spanish', ...) per resource
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_index'
+down_revision = 'add_low_stock_index'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_COLUMNS = {
+    'field': ('name', 'crop', 'location'),
+    'inventory': ('name', 'supplier', 'notes'),
+    'equipment': ('name', 'brand', 'model', 'serial_number'),
+    'staff': ('name', 'position'),
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, columns in SEARCH_COLUMNS.items():
+        if dialect == 'sqlite':
+            fts = f"{table}_search"
+            cols = ', '.join(columns)
+            new = ', '.join(f"new.{column}" for column in columns)
+            old = ', '.join(f"old.{column}" for column in columns)
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, user_id UNINDEXED, "
+                       f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+            op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                       f"INSERT INTO {fts}(rowid, {cols}, user_id) VALUES (new.id, {new}, new.user_id); END")
+            op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                       f"INSERT INTO {fts}({fts}, rowid, {cols}, user_id) VALUES ('delete', old.id, {old}, old.user_id); END")
+            op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+                       f"INSERT INTO {fts}({fts}, rowid, {cols}, user_id) VALUES ('delete', old.id, {old}, old.user_id); "
+                       f"INSERT INTO {fts}(rowid, {cols}, user_id) VALUES (new.id, {new}, new.user_id); END")
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect == 'postgresql':
+            vector = "to_tsvector('spanish', " + " || ' ' || ".join(f"coalesce({c}, '')" for c in columns) + ")"
+            op.execute(f"CREATE INDEX ix_{table}_search ON {table} USING gin ({vector})")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in SEARCH_COLUMNS:
+        if dialect == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_search")
+        elif dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search")
@@ -0,0 +1,47 @@
+"""Add per-tenant indexes
+
+Revision ID: add_tenant_indexes
+Revises: remove_staff_email_unique
+Create Date: 2026-10-18 09:00:00.000000
+
+- Composite (user_id, id) and (user_id, updated_at) indexes on every
+  tenant table, used by the list endpoints and keyset pagination
+- field_id indexes for joins and cascades from field
+- (user_id, email) on staff for the duplicate-email check
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tenant_indexes'
+down_revision = 'remove_staff_email_unique'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_field_user_id_id', 'field', ['user_id', 'id']),
+    ('ix_field_user_id_updated_at', 'field', ['user_id', 'updated_at']),
+    ('ix_inventory_user_id_id', 'inventory', ['user_id', 'id']),
+    ('ix_inventory_user_id_updated_at', 'inventory', ['user_id', 'updated_at']),
+    ('ix_inventory_field_id', 'inventory', ['field_id']),
+    ('ix_equipment_user_id_id', 'equipment', ['user_id', 'id']),
+    ('ix_equipment_user_id_updated_at', 'equipment', ['user_id', 'updated_at']),
+    ('ix_equipment_field_id', 'equipment', ['field_id']),
+    ('ix_staff_user_id_id', 'staff', ['user_id', 'id']),
+    ('ix_staff_user_id_updated_at', 'staff', ['user_id', 'updated_at']),
+    ('ix_staff_user_id_email', 'staff', ['user_id', 'email']),
+    ('ix_staff_field_id', 'staff', ['field_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
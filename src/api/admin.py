@@ -13,7 +13,7 @@ class UserAdminView(ModelView):
     
     def on_model_change(self, form, model, is_created):
         if 'password' in form:
-            model.password = generate_password_hash(form.password.data)
+            model.set_password(form.password.data)
         return super().on_model_change(form, model, is_created)
 
 class FieldAdminView(ModelView):
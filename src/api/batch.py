@@ -0,0 +1,155 @@
+from sqlalchemy import insert, update, delete
+from .models import db, Field, Inventory, Equipment, Staff, VERSIONED_RESOURCES, increment_data_versions
+from .validators import inventory_values, equipment_values, staff_values
+
+"""
+Operaciones en lote: {"create": [...], "update": [{"id": ..., ...}], "delete": [ids]}
+
+Todo el lote se valida antes de escribir nada. Si no hay errores se escribe
+en una sola transacción con INSERT/UPDATE multi-fila (executemany) en lugar
+de un commit por ítem como hacen las rutas individuales.
+"""
+
+MAX_BATCH_SIZE = 1000
+
+BATCH_VALIDATORS = {
+    Inventory: inventory_values,
+    Equipment: equipment_values,
+    Staff: staff_values,
+}
+
+
+class BatchError(Exception):
+    def __init__(self, message, errors=None):
+        Exception.__init__(self, message)
+        self.message = message
+        self.errors = errors or []
+
+
+def validate_batch(model, payload, user_id):
+    """Valida y convierte el lote completo. Devuelve (creates, updates, deletes)."""
+    if not isinstance(payload, dict):
+        raise BatchError("El cuerpo debe ser un objeto con create, update y/o delete")
+    creates_in = payload.get('create') or []
+    updates_in = payload.get('update') or []
+    deletes_in = payload.get('delete') or []
+    if not all(isinstance(ops, list) for ops in (creates_in, updates_in, deletes_in)):
+        raise BatchError("create, update y delete deben ser listas")
+    total = len(creates_in) + len(updates_in) + len(deletes_in)
+    if total == 0:
+        raise BatchError("El lote está vacío")
+    if total > MAX_BATCH_SIZE:
+        raise BatchError(f"El lote no puede superar {MAX_BATCH_SIZE} operaciones")
+
+    to_values = BATCH_VALIDATORS[model]
+    errors = []
+    creates, updates, deletes = [], [], []
+
+    for index, data in enumerate(creates_in):
+        try:
+            creates.append(dict(to_values(data), user_id=user_id))
+        except ValueError as e:
+            errors.append({"op": "create", "index": index, "error": str(e)})
+
+    for index, data in enumerate(updates_in):
+        try:
+            if not isinstance(data, dict) or not isinstance(data.get('id'), int):
+                raise ValueError("Cada actualización necesita un id entero")
+            updates.append(dict(to_values(data, partial=True), id=data['id']))
+        except ValueError as e:
+            errors.append({"op": "update", "index": index, "error": str(e)})
+
+    for index, item_id in enumerate(deletes_in):
+        if isinstance(item_id, int):
+            deletes.append(item_id)
+        else:
+            errors.append({"op": "delete", "index": index, "error": "El id debe ser un entero"})
+
+    # Los ids a modificar y los campos referenciados deben ser del usuario (una consulta cada uno)
+    target_ids = {values['id'] for values in updates} | set(deletes)
+    if target_ids:
+        owned = {row.id for row in db.session.query(model.id).filter(
+            model.user_id == user_id, model.id.in_(target_ids))}
+        for op, items in (("update", [values['id'] for values in updates]), ("delete", deletes)):
+            for index, item_id in enumerate(items):
+                if item_id not in owned:
+                    errors.append({"op": op, "index": index, "error": f"Registro {item_id} no encontrado"})
+    if len(set(deletes)) != len(deletes) or {values['id'] for values in updates} & set(deletes):
+        errors.append({"op": "delete", "index": None, "error": "Un mismo id aparece más de una vez en el lote"})
+
+    field_ids = {values['field_id'] for values in creates + updates if values.get('field_id')}
+    if field_ids:
+        owned_fields = {row.id for row in db.session.query(Field.id).filter(
+            Field.user_id == user_id, Field.id.in_(field_ids))}
+        for op, items in (("create", creates), ("update", updates)):
+            for index, values in enumerate(items):
+                if values.get('field_id') and values['field_id'] not in owned_fields:
+                    errors.append({"op": op, "index": index, "error": "La finca especificada no existe"})
+
+    if model is Staff:
+        errors.extend(duplicate_staff_emails(creates, updates, set(deletes), user_id))
+
+    if errors:
+        raise BatchError("Lote inválido, no se guardó ningún cambio", errors)
+    return creates, updates, deletes
+
+
+def duplicate_staff_emails(creates, updates, deleted_ids, user_id):
+    """El email del personal es único por usuario, igual que en create_staff"""
+    errors = []
+    emails = {values['email'] for values in creates + updates if values.get('email')}
+    if not emails:
+        return errors
+    # Los registros que se borran o cambian de email liberan el suyo
+    released = deleted_ids | {values['id'] for values in updates if 'email' in values}
+    taken = {email for email, staff_id in db.session.query(Staff.email, Staff.id).filter(
+        Staff.user_id == user_id, Staff.email.in_(emails)) if staff_id not in released}
+    for op, items in (("update", updates), ("create", creates)):
+        for index, values in enumerate(items):
+            email = values.get('email')
+            if not email:
+                continue
+            if email in taken:
+                errors.append({"op": op, "index": index, "error": "Ya existe un personal con ese email"})
+            taken.add(email)
+    return errors
+
+
+def apply_batch(model, creates, updates, deletes, user_id):
+    """Escribe el lote ya validado en una sola transacción y devuelve el resultado por ítem"""
+    results = []
+    try:
+        if creates:
+            # SQLite no garantiza el orden de RETURNING en inserts multi-fila (SQLAlchemy
+            # volvería a un INSERT por fila), pero asigna los rowid en orden creciente
+            # según VALUES, así que basta con ordenar los ids devueltos.
+            ordered = db.session.get_bind().dialect.name != 'sqlite'
+            new_ids = db.session.scalars(
+                insert(model).returning(model.id, sort_by_parameter_order=ordered),
+                creates
+            ).all()
+            if not ordered:
+                new_ids = sorted(new_ids)
+            results.extend({"op": "create", "index": index, "id": new_id, "status": "created"}
+                           for index, new_id in enumerate(new_ids))
+        # UPDATE por clave primaria agrupado por conjunto de columnas (executemany)
+        if updates:
+            db.session.execute(update(model), updates)
+            results.extend({"op": "update", "index": index, "id": values['id'], "status": "updated"}
+                           for index, values in enumerate(updates))
+        if deletes:
+            db.session.execute(
+                delete(model).where(model.user_id == user_id, model.id.in_(deletes)),
+                execution_options={"synchronize_session": False}
+            )
+            results.extend({"op": "delete", "index": index, "id": item_id, "status": "deleted"}
+                           for index, item_id in enumerate(deletes))
+
+        # Estas escrituras no pasan por el flush de la sesión: subir la versión a mano
+        increment_data_versions(db.session.connection(),
+                                {(user_id, resource) for resource in VERSIONED_RESOURCES[model]})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return results
@@ -1,6 +1,21 @@
 
+import re
+import sys
+import time
 import click
-from api.models import db, User
+from datetime import datetime, timedelta
+from werkzeug.datastructures import MultiDict
+from werkzeug.security import generate_password_hash, check_password_hash
+from .models import (db, User, Field, Inventory, Equipment, Staff, RESOURCE_MODELS,
+                     data_versions_query, password_hash_method, password_hash_prefix)
+from .importer import open_csv, import_rows
+from .geo import bbox_around, bbox_query
+from .fieldsets import FIELDSETS
+from .filters import FILTERABLE, SORTABLE, get_filters, sort_query
+from .search import search_statement
+from .utils import MAX_PAGE_SIZE, keyset_query
+from .routes import export_query, list_query, maintenance_queries, overview_queries
+from .forecast import MAX_LOCATIONS_PER_CALL, cells_due, fetch_many, grid_key
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
@@ -61,4 +76,204 @@ def setup_commands(app):
             
         except Exception as e:
             db.session.rollback()
-            print(f"Error al crear el usuario administrador: {str(e)}")
\ No newline at end of file
+            print(f"Error al crear el usuario administrador: {str(e)}")
+
+    @app.cli.command("check-query-plans")
+    def check_query_plans():
+        """Ejecuta EXPLAIN sobre las consultas de las rutas y falla si alguna hace un scan completo"""
+        failures = 0
+        for route, query in route_queries():
+            plan = explain(query)
+            full_scan = [line for line in plan if is_full_scan(line)]
+            print(f"{'FAIL' if full_scan else 'OK  '} {route}")
+            for line in plan:
+                print(f"       {line}")
+            failures += bool(full_scan)
+
+        if failures:
+            print(f"{failures} consulta(s) sin índice")
+            sys.exit(1)
+        print("Todas las consultas usan índices")
+
+    @app.cli.command("import-data")
+    @click.argument("resource", type=click.Choice(['inventory', 'equipment']))
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--user-email", required=True, help="Usuario dueño de los registros importados")
+    @click.option("--delimiter", default=None, help="Separador del CSV (por defecto se detecta ',' o ';')")
+    def import_data(resource, path, user_email, delimiter):
+        """Importa un CSV de inventario o equipos en lotes, mostrando el progreso"""
+        user = User.query.filter_by(email=user_email).first()
+        if not user:
+            print(f"Error: No existe un usuario con el correo {user_email}")
+            sys.exit(1)
+
+        def report(summary):
+            print(f"  {summary['processed']} filas procesadas, "
+                  f"{summary['inserted']} insertadas, {summary['error_count']} con errores")
+
+        with open(path, 'rb') as stream:
+            summary = import_rows(RESOURCE_MODELS[resource], open_csv(stream, delimiter), user.id, report)
+
+        for error in summary['errors']:
+            print(f"  línea {error['line']}: {error['error']}")
+        print(f"Importación finalizada: {summary['inserted']} de {summary['processed']} filas "
+              f"insertadas, {summary['error_count']} con errores")
+        if summary['error_count']:
+            sys.exit(1)
+
+    @app.cli.command("prefetch-weather")
+    @click.option("--lead", default=15, show_default=True, help="Minutos antes de vencer en que se refresca una celda")
+    @click.option("--max-calls", default=10, show_default=True, help="Máximo de llamadas al servicio por ronda")
+    @click.option("--spacing", default=5.0, show_default=True, help="Segundos entre llamadas al servicio")
+    @click.option("--every", default=0, show_default=True, help="Minutos entre rondas (0 = una sola ronda)")
+    def prefetch_weather(lead, max_calls, spacing, every):
+        """Refresca el pronóstico de las celdas de los campos antes de que venza"""
+        while True:
+            prefetch_round(lead * 60, max_calls, spacing)
+            if not every:
+                break
+            time.sleep(every * 60)
+
+    @app.cli.command("benchmark-password-hashing")
+    @click.argument("methods", nargs=-1)
+    @click.option("--seconds", default=2.0, show_default=True, help="Duración de la medición por método")
+    def benchmark_password_hashing(methods, seconds):
+        """Mide logins por segundo por núcleo (una verificación de hash) para cada método"""
+        configured = password_hash_prefix(password_hash_method())
+        print(f"{'método':<26} {'ms/login':>9} {'logins/s/núcleo':>16}")
+        for method in methods or BENCHMARK_HASH_METHODS:
+            ms, per_second = benchmark_hash(method, seconds)
+            current = '  <- actual' if password_hash_prefix(method) == configured else ''
+            print(f"{password_hash_prefix(method):<26} {ms:>9.1f} {per_second:>16.1f}{current}")
+
+
+# Métodos que compara benchmark-password-hashing si no se indican otros
+BENCHMARK_HASH_METHODS = (
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:1000000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+)
+
+
+def benchmark_hash(method, seconds):
+    """(ms por verificación, verificaciones por segundo) en un solo hilo"""
+    password = 'benchmark-password'
+    hashed = generate_password_hash(password, method)
+    count, start = 0, time.perf_counter()
+    while True:
+        check_password_hash(hashed, password)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed * 1000 / count, count / elapsed
+
+
+def prefetch_round(lead_seconds, max_calls, spacing):
+    """Una ronda de prefetch-weather: como máximo max_calls llamadas
+    multi-ubicación, separadas por spacing segundos"""
+    coords = db.session.query(Field.latitude, Field.longitude).filter(
+        Field.latitude.isnot(None), Field.longitude.isnot(None)
+    ).distinct().all()
+    keys = [grid_key(lat, lon) for lat, lon in coords]
+    due = cells_due(keys, lead_seconds)
+    budget = max_calls * MAX_LOCATIONS_PER_CALL
+    print(f"{len(set(keys))} celdas, {len(due)} por refrescar, hasta {min(len(due), budget)} en esta ronda")
+
+    refreshed = failed = 0
+    for start in range(0, min(len(due), budget), MAX_LOCATIONS_PER_CALL):
+        if start:
+            time.sleep(spacing)
+        results, errors = fetch_many(due[start:start + MAX_LOCATIONS_PER_CALL])
+        refreshed += len(results)
+        failed += len(errors)
+    print(f"Pronósticos refrescados: {refreshed}, con error: {failed}")
+    return refreshed, failed
+
+
+def get_label(path, *args):
+    """Etiqueta GET /api/<path>?a&b para la salida de check-query-plans"""
+    return f"GET /api/{path}" + (f"?{'&'.join(args)}" if args else "")
+
+
+def route_queries(user_id=1):
+    """
+    Las consultas que emiten las rutas de routes.py, construidas con los mismos
+    helpers que usan las rutas y con parámetros de ejemplo
+    """
+    now = datetime(2026, 1, 1)
+    queries = [
+        # Lo ejecuta etag_versioned antes de cada GET de recursos
+        ("GET (ETag) data_version", data_versions_query(user_id, list(RESOURCE_MODELS))),
+    ]
+    # Listados con ?fields=, filtros, orden y paginación
+    for path, model in RESOURCE_MODELS.items():
+        for fieldset in (None, ['id', 'name']):
+            args = ['fields=id,name'] if fieldset else []
+            query = list_query(model, fieldset)[0].filter(model.user_id == user_id)
+            queries.append((get_label(path, *args), sort_query(query, model.id, None)))
+            queries.append((get_label(path, *args, 'limit'), keyset_query(query, model.id, MAX_PAGE_SIZE)))
+            queries.append((get_label(path, *args, 'limit', 'cursor'),
+                            keyset_query(query, model.id, MAX_PAGE_SIZE, [1])))
+        query = list_query(model)[0].filter(model.user_id == user_id)
+        for key in FILTERABLE[model]:
+            filters = get_filters(MultiDict({key: '1'}), model)
+            queries.append((get_label(path, f'{key}=1'), query.filter(*filters)))
+        for key, column in SORTABLE[model].items():
+            for descending in (False, True):
+                sort = (column, descending)
+                queries.append((get_label(path, f"sort={'-' if descending else ''}{key}", 'limit'),
+                                keyset_query(query, model.id, MAX_PAGE_SIZE, sort=sort)))
+
+    queries.append(("GET /api/inventory/low-stock", list_query(Inventory)[0].filter(
+        Inventory.user_id == user_id, Inventory.low_stock()).order_by(Inventory.id)))
+    for name, query in maintenance_queries(user_id, now, now + timedelta(days=30), now).items():
+        queries.append((f"GET /api/equipment/maintenance ({name})", query))
+    for name, query in overview_queries(user_id, now).items():
+        queries.append((f"GET /api/dashboard/overview ({name})", query))
+    queries.append(("GET /api/fields/bbox", bbox_query(user_id, 4.0, -75.0, 5.0, -73.0)))
+    queries.append(("GET /api/fields/nearby", bbox_query(user_id, *bbox_around(4.6, -74.1, 25))))
+    queries.append(("GET /api/search", search_statement(user_id, 'cafe', 20)))
+    queries.append(("GET /api/search?cursor", search_statement(user_id, 'cafe', 20, [-1.0, 'fields', 1])))
+    for resource, model in RESOURCE_MODELS.items():
+        queries.append((f"GET /api/export/{resource}", export_query(model, list(FIELDSETS[model]), user_id)))
+
+    queries.append(("POST /api/staff (email duplicado)", Staff.query.filter_by(email='a@b.com', user_id=user_id)))
+    # Cascada de la relación al borrar un campo
+    field = Field(id=1)
+    for relationship in (Field.inventory_list, Field.equipment_list, Field.staff_list):
+        queries.append((f"DELETE /api/fields/<id> ({relationship.key})",
+                        relationship.property.mapper.class_.query.filter(db.with_parent(field, relationship))))
+    return queries
+
+
+def explain(query):
+    """Devuelve el plan de ejecución de una consulta como lista de líneas"""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    # Query del ORM o sentencia de texto con sus parámetros (búsqueda)
+    compiled = getattr(query, 'statement', query).compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).fetchall()
+        return [row[-1] for row in rows]
+
+    # En tablas pequeñas Postgres prefiere el seq scan aunque exista un índice;
+    # lo desactivamos para comprobar que el índice existe y es utilizable.
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    rows = connection.exec_driver_sql('EXPLAIN ' + str(compiled), params).fetchall()
+    return [row[0] for row in rows]
+
+
+def is_full_scan(line):
+    if line.startswith('SCAN '):
+        # Tablas virtuales (R-tree, FTS5): "INDEX n:<restricciones>" es una búsqueda indexada
+        if re.search(r'VIRTUAL TABLE INDEX \d+:\S', line):
+            return False
+        return 'USING INDEX' not in line and 'USING COVERING INDEX' not in line
+    return 'Seq Scan' in line
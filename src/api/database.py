@@ -1,4 +1,161 @@
+import os
+import random
+import sqlite3
+import time
+from flask import g, request, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .cache import TTLCache, MISSING
+
+
+# ======================
+# Réplicas de lectura
+# ======================
+# Las réplicas se configuran como binds "replica_0", "replica_1", ... a partir
+# de DATABASE_REPLICA_URLS (URLs separadas por comas). Sin réplicas todo va
+# al primario, como siempre.
+#
+# Una consulta va a una réplica solo si:
+# - es parte de una petición GET/HEAD,
+# - la sesión no tiene cambios pendientes ni escribió nada en esta petición,
+# - no es INSERT/UPDATE/DELETE,
+# - el usuario no escribió en los últimos REPLICA_RYW_SECONDS (lee sus
+#   propias escrituras desde el primario). Se recuerda por usuario en el
+#   proceso y con una cookie de vida corta, para cuando la siguiente petición
+#   llega a otro worker.
+REPLICA_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD')
+REPLICA_RYW_SECONDS = int(os.getenv('DATABASE_REPLICA_RYW_SECONDS', 5))
+RYW_COOKIE = 'read_primary'
+
+_recent_writers = TTLCache(10000)
+
+
+def replica_binds(urls, options=None):
+    """SQLALCHEMY_BINDS para las réplicas de "url1,url2" """
+    binds = {}
+    for index, url in enumerate(u.strip() for u in (urls or '').split(',') if u.strip()):
+        url = normalize_url(url)
+        binds[f'{REPLICA_PREFIX}{index}'] = {"url": url, **(options or engine_options(url))}
+    return binds
+
+
+class RoutingSession(Session):
+    """Sesión que envía las lecturas de las peticiones GET a una réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._can_use_replica(clause):
+            replica = _request_replica(self._db)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _can_use_replica(self, clause):
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if self._flushing or self.new or self.dirty or self.deleted:
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return False
+        return not reads_from_primary()
+
 
 # Crear instancia global de db
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def _request_replica(database):
+    """Réplica elegida para la petición actual (la misma para todas sus consultas)"""
+    if 'db_replica' not in g:
+        replicas = [engine for key, engine in database.engines.items()
+                    if key and key.startswith(REPLICA_PREFIX)]
+        g.db_replica = random.choice(replicas) if replicas else None
+    return g.db_replica
+
+
+def reads_from_primary():
+    """La petición actual debe leer del primario (escribió o el usuario escribió hace poco)"""
+    if g.get('db_wrote') or request.cookies.get(RYW_COOKIE):
+        return True
+    user = g.get('current_user')
+    return user is not None and _recent_writers.get(user.id) is not MISSING
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def pin_to_primary(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def init_replicas(app):
+    """Recuerda a los usuarios que escriben, para leer sus cambios desde el primario"""
+    # Sin réplicas todo se lee del primario: no hace falta la cookie
+    if not any(key.startswith(REPLICA_PREFIX) for key in app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    @app.after_request
+    def remember_writer(response):
+        if request.method in READ_METHODS or not g.get('db_wrote') or response.status_code >= 400:
+            return response
+        user = g.get('current_user')
+        if user is not None:
+            _recent_writers.set(user.id, time.monotonic(), REPLICA_RYW_SECONDS)
+        response.set_cookie(RYW_COOKIE, '1', max_age=REPLICA_RYW_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+
+# ======================
+# Configuración del motor
+# ======================
+# PRAGMAs aplicados a cada conexión SQLite nueva:
+# - WAL: los lectores no bloquean al escritor ni viceversa
+# - synchronous=NORMAL: seguro con WAL y sin fsync en cada commit
+# - busy_timeout: esperar el lock en lugar de fallar con "database is locked"
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    # Negativo = KiB: 64 MiB de caché de páginas por conexión
+    f"PRAGMA cache_size={-int(os.getenv('SQLITE_CACHE_KIB', 64 * 1024))}",
+)
+
+
+def database_url(default):
+    """URL de DATABASE_URL, o default"""
+    return normalize_url(os.getenv('DATABASE_URL') or default)
+
+
+def normalize_url(url):
+    """Los esquemas postgres:// (Render/Heroku) y postgresql:// sin driver usan
+    psycopg2, que es la dependencia del proyecto"""
+    for scheme in ('postgres://', 'postgresql://'):
+        if url.startswith(scheme):
+            url = 'postgresql+psycopg2://' + url[len(scheme):]
+    return url
+
+
+def engine_options(url):
+    """Opciones del pool para Postgres, configurables por entorno"""
+    if not url.startswith('postgresql'):
+        return {}
+    return {
+        "pool_size": int(os.getenv('DB_POOL_SIZE', 5)),
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        "pool_timeout": int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        # Descarta conexiones cortadas por el proveedor antes de usarlas
+        "pool_pre_ping": os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
@@ -0,0 +1,43 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from .models import get_data_versions
+from .identity import load_identity
+
+"""
+ETags para los GET de recursos del usuario.
+
+Cada escritura sobre Field, Inventory, Equipment o Staff incrementa el
+contador de DataVersion del usuario (ver models.py). El ETag se construye
+con esos contadores y la URL completa, así que si el cliente envía un
+If-None-Match que coincide respondemos 304 sin ejecutar la consulta del
+listado ni serializar nada.
+"""
+
+
+def build_etag(user_id, resources, versions):
+    key = f"{user_id}:{request.full_path}:" + ",".join(
+        f"{resource}={version}" for resource, version in zip(resources, versions)
+    )
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def etag_versioned(*resources):
+    """Decorador: responde 304 si el ETag del cliente sigue vigente"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current_user_id = load_identity().id
+            etag = build_etag(current_user_id, resources, get_data_versions(current_user_id, resources))
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
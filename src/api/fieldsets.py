@@ -0,0 +1,124 @@
+from datetime import date, datetime
+from .models import db, User, Field, Inventory, Equipment, Staff
+from .utils import APIException
+
+"""
+Sparse fieldsets: ?fields=name,status,field_name
+
+Cuando una petición pide solo algunas claves, la consulta proyecta únicamente
+esas columnas (y hace el JOIN con field solo si se pide field_name), de modo
+que la base de datos, el ORM y jsonify trabajan con lo mínimo necesario.
+Las claves disponibles son las mismas que devuelve serialize() de cada modelo.
+"""
+
+# Claves expuestas por cada modelo -> expresión SQL que las produce
+FIELDSETS = {
+    User: {
+        "id": User.id,
+        "email": User.email,
+        "first_name": User.first_name,
+        "last_name": User.last_name,
+        "role": User.role,
+    },
+    Field: {
+        "id": Field.id,
+        "name": Field.name,
+        "location": Field.location,
+        "city": Field.city,
+        "latitude": Field.latitude,
+        "longitude": Field.longitude,
+        "size": Field.size,
+        "crop": Field.crop,
+        "area": Field.area,
+        "status": Field.status,
+        "next_action": Field.next_action,
+        "created_at": Field.created_at,
+        "updated_at": Field.updated_at,
+    },
+    Inventory: {
+        "id": Inventory.id,
+        "name": Inventory.name,
+        "quantity": Inventory.quantity,
+        "min_quantity": Inventory.min_quantity,
+        "unit": Inventory.unit,
+        "category": Inventory.category,
+        "supplier": Inventory.supplier,
+        "notes": Inventory.notes,
+        "field_id": Inventory.field_id,
+        "field_name": Field.name,
+        "created_at": Inventory.created_at,
+        "updated_at": Inventory.updated_at,
+    },
+    Equipment: {
+        "id": Equipment.id,
+        "name": Equipment.name,
+        "type": Equipment.type,
+        "brand": Equipment.brand,
+        "model": Equipment.model,
+        "year": Equipment.year,
+        "serial_number": Equipment.serial_number,
+        "purchase_date": Equipment.purchase_date,
+        "status": Equipment.status,
+        "last_maintenance": Equipment.last_maintenance,
+        "next_maintenance": Equipment.next_maintenance,
+        "notes": Equipment.notes,
+        "field_id": Equipment.field_id,
+        "field_name": Field.name,
+        "created_at": Equipment.created_at,
+        "updated_at": Equipment.updated_at,
+    },
+    Staff: {
+        "id": Staff.id,
+        "name": Staff.name,
+        "email": Staff.email,
+        "phone": Staff.phone,
+        "position": Staff.position,
+        "hire_date": Staff.hire_date,
+        "salary": Staff.salary,
+        "status": Staff.status,
+        "notes": Staff.notes,
+        "field_id": Staff.field_id,
+        "field_name": Field.name,
+        "created_at": Staff.created_at,
+        "updated_at": Staff.updated_at,
+    },
+}
+
+
+def get_fieldset(args, model):
+    """
+    Lee ?fields= y devuelve la lista de claves pedidas, o None si no se pidió.
+    El id siempre se incluye porque lo necesitan los cursores y el frontend.
+    """
+    raw = args.get('fields')
+    if not raw:
+        return None
+    available = FIELDSETS[model]
+    keys = ['id']
+    for key in raw.split(','):
+        key = key.strip()
+        if not key or key in keys:
+            continue
+        if key not in available:
+            raise APIException(f"Campo desconocido en fields: {key}", status_code=400,
+                               payload={"available": sorted(available)})
+        keys.append(key)
+    return keys
+
+
+def sparse_query(model, keys):
+    """Consulta que selecciona solo las columnas de las claves pedidas"""
+    columns = FIELDSETS[model]
+    query = db.session.query(*[columns[key].label(key) for key in keys]).select_from(model)
+    if model is not Field and 'field_name' in keys:
+        query = query.outerjoin(Field, model.field_id == Field.id)
+    return query
+
+
+def row_to_dict(row):
+    """Convierte una fila proyectada al mismo formato que serialize()"""
+    data = row._asdict()
+    for key, value in data.items():
+        if isinstance(value, (date, datetime)):
+            data[key] = value.isoformat()
+    return data
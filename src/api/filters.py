@@ -0,0 +1,85 @@
+from .models import Field, Inventory, Equipment, Staff
+from .utils import APIException
+
+"""
+Filtros y orden del lado del servidor para los listados:
+
+    ?category=Semillas&status=Operativo,Activo&field_id=3&sort=-updated_at
+
+Solo se aceptan las columnas de la lista blanca de cada modelo. Los filtros
+son igualdades (o IN si el valor lleva comas) y el orden admite una sola
+columna, ascendente o descendente con '-'. Todas las combinaciones se apoyan
+en índices (user_id, columna) declarados en models.py.
+"""
+
+# Parámetros de la query string que no son filtros
+RESERVED_PARAMS = {'limit', 'cursor', 'paginate', 'fields', 'sort', 'format', 'delimiter'}
+
+FILTERABLE = {
+    Field: {'status': Field.status, 'crop': Field.crop, 'city': Field.city},
+    Inventory: {'category': Inventory.category, 'field_id': Inventory.field_id,
+                'supplier': Inventory.supplier, 'unit': Inventory.unit},
+    Equipment: {'status': Equipment.status, 'type': Equipment.type,
+                'field_id': Equipment.field_id, 'brand': Equipment.brand},
+    Staff: {'status': Staff.status, 'position': Staff.position, 'field_id': Staff.field_id},
+}
+
+# Solo columnas no nulas, para que el cursor (valor, id) siempre sea comparable
+SORTABLE = {
+    model: {'id': model.id, 'name': model.name, 'updated_at': model.updated_at}
+    for model in (Field, Inventory, Equipment, Staff)
+}
+
+
+def get_filters(args, model):
+    """Condiciones WHERE de la petición, validadas contra la lista blanca del modelo"""
+    allowed = FILTERABLE[model]
+    conditions = []
+    for key in args:
+        if key in RESERVED_PARAMS:
+            continue
+        column = allowed.get(key)
+        if column is None:
+            raise APIException(f"Filtro no permitido: {key}", status_code=400,
+                               payload={"filters": sorted(allowed)})
+        values = [value.strip() for value in args.get(key).split(',') if value.strip()]
+        if key == 'field_id':
+            try:
+                values = [int(value) for value in values]
+            except ValueError:
+                raise APIException("El filtro field_id debe ser un entero", status_code=400)
+        if not values:
+            continue
+        conditions.append(column == values[0] if len(values) == 1 else column.in_(values))
+    return conditions
+
+
+def get_sort(args, model):
+    """Lee ?sort=columna o ?sort=-columna. Devuelve (columna, descendente) o None."""
+    raw = args.get('sort')
+    if not raw:
+        return None
+    descending = raw.startswith('-')
+    key = raw.lstrip('-+')
+    column = SORTABLE[model].get(key)
+    if column is None:
+        raise APIException(f"No se puede ordenar por {key}", status_code=400,
+                           payload={"sort": sorted(SORTABLE[model])})
+    return column, descending
+
+
+def with_sort_key(fieldset, sort):
+    """La columna de orden tiene que venir en la proyección para construir el cursor"""
+    if fieldset and sort and sort[0].key not in fieldset:
+        fieldset.append(sort[0].key)
+    return fieldset
+
+
+def sort_query(query, id_column, sort):
+    """Orden para los listados sin paginar (la paginación ordena en keyset_page)"""
+    if not sort:
+        return query
+    column, descending = sort
+    if descending:
+        return query.order_by(column.desc(), id_column.desc())
+    return query.order_by(column.asc(), id_column.asc())
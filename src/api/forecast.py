@@ -0,0 +1,244 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from .models import db, ForecastCache
+from .cache import TTLCache, MISSING
+from .weather_client import WeatherServiceError, weather_client
+
+"""
+Pronóstico de Open-Meteo con caché por celda de coordenadas redondeadas.
+
+- Fresco (menos de FRESH_SECONDS): se sirve sin consultar al servicio.
+- Viejo (menos de STALE_SECONDS): se sirve y se refresca en segundo plano.
+- Vencido o ausente: se consulta al servicio antes de responder; si el
+  servicio falla se sirve el último pronóstico guardado, si existe.
+
+Las consultas simultáneas de la misma celda comparten una sola llamada al
+servicio, y las celdas sin caché de una misma petición se piden juntas en
+una llamada multi-ubicación. La caché vive en memoria y en la tabla
+forecast_cache, que comparten todos los procesos.
+"""
+
+FORECAST_PARAMS = {
+    "current_weather": "true",
+    "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
+    "timezone": "auto",
+}
+
+# Dos decimales ~ 1 km, por debajo de la resolución de los modelos
+COORD_DECIMALS = 2
+# Los modelos de Open-Meteo se actualizan cada hora
+FRESH_SECONDS = 60 * 60
+STALE_SECONDS = 6 * 60 * 60
+MEMORY_CACHE_SIZE = 4096
+# Ubicaciones por llamada multi-ubicación
+MAX_LOCATIONS_PER_CALL = 50
+# Espera máxima de una petición por la llamada que ya hace otra
+COALESCE_WAIT_SECONDS = 30
+
+
+class ForecastError(Exception):
+    pass
+
+
+class _Flight:
+    """Una llamada al servicio en curso y quienes esperan su resultado"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+_memory = TTLCache(MEMORY_CACHE_SIZE)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def grid_key(lat, lon):
+    """Celda de la caché: coordenadas redondeadas como texto "lat,lon" """
+    return f"{round(float(lat), COORD_DECIMALS)},{round(float(lon), COORD_DECIMALS)}"
+
+
+def get_forecast(lat, lon):
+    """JSON del pronóstico para (lat, lon); lanza ForecastError si no hay datos"""
+    forecasts = get_forecasts([(lat, lon)])
+    if not forecasts:
+        raise ForecastError("Sin datos del servicio de clima")
+    return forecasts[grid_key(lat, lon)]
+
+
+def get_forecasts(coords):
+    """Pronósticos de varias coordenadas: {grid_key: JSON}.
+
+    Las celdas repetidas se consultan una vez y las que no están en caché
+    se piden juntas en llamadas multi-ubicación. Las celdas sin datos no
+    aparecen en el resultado."""
+    forecasts, stale, misses = {}, [], []
+    now = datetime.utcnow()
+    for key in dict.fromkeys(grid_key(lat, lon) for lat, lon in coords):
+        entry = _cached(key)
+        if entry is not None:
+            data, fetched_at = entry
+            age = (now - fetched_at).total_seconds()
+            if age < STALE_SECONDS:
+                forecasts[key] = data
+                if age >= FRESH_SECONDS:
+                    stale.append(key)
+                continue
+        misses.append(key)
+
+    if stale:
+        refresh_in_background(stale)
+    if misses:
+        fetched, errors = fetch_many(misses)
+        forecasts.update(fetched)
+        for key in errors:
+            # Servicio caído o circuito abierto: mejor un pronóstico vencido que ninguno
+            row = db.session.get(ForecastCache, key)
+            if row is not None:
+                forecasts[key] = json.loads(row.data)
+    return forecasts
+
+
+def summarize_forecast(data):
+    """Clima actual y resumen del día, como lo devuelven las rutas de clima"""
+    current = data.get('current_weather', {})
+    daily = data.get('daily', {})
+    return {
+        "current": {
+            "temperature": current.get('temperature'),
+            "windspeed": current.get('windspeed'),
+            "winddirection": current.get('winddirection'),
+            "is_day": current.get('is_day'),
+            "weather_code": current.get('weathercode'),
+            "time": current.get('time')
+        },
+        "daily": {
+            "max_temp": daily.get('temperature_2m_max', [])[0] if daily.get('temperature_2m_max') else None,
+            "min_temp": daily.get('temperature_2m_min', [])[0] if daily.get('temperature_2m_min') else None,
+            "precipitation": daily.get('precipitation_sum', [])[0] if daily.get('precipitation_sum') else None
+        }
+    }
+
+
+def _cached(key):
+    """(data, fetched_at) desde memoria o desde forecast_cache, o None"""
+    entry = _memory.get(key)
+    if entry is not MISSING and (datetime.utcnow() - entry[1]).total_seconds() < FRESH_SECONDS:
+        return entry
+    # Viejo en memoria: otro proceso (p. ej. prefetch-weather) pudo refrescarlo
+    row = db.session.get(ForecastCache, key)
+    if row is None or (entry is not MISSING and row.fetched_at <= entry[1]):
+        return None if entry is MISSING else entry
+    entry = (json.loads(row.data), row.fetched_at)
+    _remember(key, entry)
+    return entry
+
+
+def cells_due(keys, lead_seconds):
+    """Celdas sin pronóstico o que dejan de estar frescas en menos de
+    lead_seconds, de la más vieja a la más nueva"""
+    keys = list(dict.fromkeys(keys))
+    fetched = dict(
+        db.session.query(ForecastCache.key, ForecastCache.fetched_at)
+        .filter(ForecastCache.key.in_(keys)).all()
+    ) if keys else {}
+    limit = datetime.utcnow() - timedelta(seconds=FRESH_SECONDS - lead_seconds)
+    due = [key for key in keys if key not in fetched or fetched[key] <= limit]
+    return sorted(due, key=lambda key: fetched.get(key, datetime.min))
+
+
+def _remember(key, entry):
+    age = (datetime.utcnow() - entry[1]).total_seconds()
+    if age < STALE_SECONDS:
+        _memory.set(key, entry, STALE_SECONDS - age)
+
+
+def fetch_many(keys):
+    """Consulta el servicio para varias celdas, en llamadas de hasta
+    MAX_LOCATIONS_PER_CALL ubicaciones. Las celdas que otra petición ya está
+    consultando esperan ese resultado. Devuelve ({key: JSON}, {key: ForecastError})"""
+    own, waiting = [], {}
+    with _inflight_lock:
+        for key in dict.fromkeys(keys):
+            flight = _inflight.get(key)
+            if flight is None:
+                flight = _inflight[key] = _Flight()
+                own.append((key, flight))
+            else:
+                waiting[key] = flight
+
+    results, errors = {}, {}
+    try:
+        for start in range(0, len(own), MAX_LOCATIONS_PER_CALL):
+            chunk = own[start:start + MAX_LOCATIONS_PER_CALL]
+            try:
+                fetched = _fetch_and_store([key for key, _ in chunk])
+            except ForecastError as e:
+                for key, flight in chunk:
+                    flight.error = errors[key] = e
+                continue
+            for (key, flight), data in zip(chunk, fetched):
+                flight.data = results[key] = data
+    finally:
+        with _inflight_lock:
+            for key, flight in own:
+                del _inflight[key]
+                if flight.data is None and flight.error is None:
+                    flight.error = ForecastError("Consulta interrumpida")
+        for _, flight in own:
+            flight.done.set()
+
+    for key, flight in waiting.items():
+        if not flight.done.wait(COALESCE_WAIT_SECONDS):
+            errors[key] = ForecastError("Tiempo de espera agotado")
+        elif flight.error is not None:
+            errors[key] = flight.error
+        else:
+            results[key] = flight.data
+    return results, errors
+
+
+def refresh_in_background(keys):
+    """Refresca las celdas en un hilo aparte, salvo las que ya se están consultando"""
+    with _inflight_lock:
+        keys = [key for key in keys if key not in _inflight]
+    if not keys:
+        return
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            fetch_many(keys)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _fetch_and_store(keys):
+    """Una llamada multi-ubicación; guarda y devuelve los JSON en el orden de keys"""
+    coords = [key.split(',') for key in keys]
+    try:
+        data = weather_client.forecast({
+            "latitude": ",".join(lat for lat, _ in coords),
+            "longitude": ",".join(lon for _, lon in coords),
+            **FORECAST_PARAMS
+        })
+    except WeatherServiceError as e:
+        raise ForecastError(str(e))
+    # Con una sola ubicación Open-Meteo devuelve un objeto en lugar de una lista
+    if isinstance(data, dict):
+        data = [data]
+    if len(data) != len(keys):
+        raise ForecastError("Respuesta incompleta del servicio de clima")
+
+    fetched_at = datetime.utcnow()
+    try:
+        for key, item in zip(keys, data):
+            _remember(key, (item, fetched_at))
+            db.session.merge(ForecastCache(key=key, data=json.dumps(item), fetched_at=fetched_at))
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+    return data
@@ -0,0 +1,133 @@
+import csv
+import difflib
+import os
+from bisect import bisect_left
+from .geocoding import normalize_place
+
+"""
+Nomenclátor offline de lugares de Colombia (departamentos y municipios).
+
+Se carga una vez al importar el módulo en un arreglo ordenado de nombres
+normalizados (sin tildes, en minúsculas), que permite buscar por nombre
+exacto, por prefijo (búsqueda binaria) y, si no hay coincidencias, por
+similitud entre los nombres que empiezan con la misma letra.
+
+El archivo incluido cubre capitales y municipios principales; para usar
+la lista completa (por ejemplo la DIVIPOLA del DANE, con veredas) basta
+un CSV con las columnas name, department, latitude, longitude, kind en
+la ruta indicada por GAZETTEER_PATH.
+"""
+
+GAZETTEER_PATH = os.getenv(
+    'GAZETTEER_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'gazetteer_co.csv')
+)
+# Prefijo mínimo para autocompletar, para no devolver media lista con "b"
+MIN_PREFIX_LENGTH = 3
+FUZZY_CUTOFF = 0.8
+# lookup resuelve el clima sin que nadie elija: solo errores de una letra
+LOOKUP_FUZZY_CUTOFF = 0.9
+# Ante nombres repetidos se prefiere el municipio
+KIND_ORDER = {'municipio': 0, 'vereda': 1, 'departamento': 2}
+
+
+class Gazetteer:
+    def __init__(self, places):
+        places = sorted(places, key=lambda p: (p['key'], KIND_ORDER.get(p['kind'], 3)))
+        self._keys = [p['key'] for p in places]
+        self._places = places
+
+    @classmethod
+    def load(cls, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls([
+                {
+                    "key": normalize_place(row['name']),
+                    "name": row['name'],
+                    "department": row['department'],
+                    "lat": float(row['latitude']),
+                    "lon": float(row['longitude']),
+                    "kind": row.get('kind') or 'municipio',
+                }
+                for row in csv.DictReader(f)
+            ])
+
+    def __len__(self):
+        return len(self._places)
+
+    def lookup(self, query):
+        """
+        Lugar para "nombre" o "nombre, departamento", o None. Solo acepta el
+        nombre exacto (sin tildes) o una variante muy cercana: un prefijo como
+        "Santa Rosa" no debe resolverse a Santa Rosa de Cabal.
+        """
+        matches = self._match(query, 1, [
+            self._exact,
+            lambda key: self._fuzzy(key, 1, LOOKUP_FUZZY_CUTOFF),
+        ])
+        return matches[0] if matches else None
+
+    def search(self, query, limit=10):
+        """Coincidencias exactas; si no hay, por prefijo; si no hay, aproximadas"""
+        return self._match(query, limit, [
+            self._exact,
+            lambda key: self._prefix(key) if len(key) >= MIN_PREFIX_LENGTH else [],
+            lambda key: self._fuzzy(key, limit, FUZZY_CUTOFF),
+        ])
+
+    def _match(self, query, limit, tiers):
+        """Primer nivel de búsqueda con resultados dentro del departamento pedido"""
+        name, _, department = (query or '').partition(',')
+        key = normalize_place(name)
+        if not key:
+            return []
+        department = normalize_place(department)
+
+        # El departamento se filtra en cada nivel: "Caldas, Antioquia" no debe
+        # quedarse en el departamento de Caldas, que coincide exacto
+        for tier in tiers:
+            places = tier(key)
+            if department:
+                places = [p for p in places if normalize_place(p['department']).startswith(department)]
+            if places:
+                places.sort(key=lambda p: (KIND_ORDER.get(p['kind'], 3), len(p['key'])))
+                return [self._public(p) for p in places[:limit]]
+        return []
+
+    def _range(self, prefix):
+        start = bisect_left(self._keys, prefix)
+        end = start
+        while end < len(self._keys) and self._keys[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def _exact(self, key):
+        start = bisect_left(self._keys, key)
+        end = start
+        while end < len(self._keys) and self._keys[end] == key:
+            end += 1
+        return self._places[start:end]
+
+    def _prefix(self, prefix):
+        start, end = self._range(prefix)
+        return self._places[start:end]
+
+    def _fuzzy(self, key, limit, cutoff):
+        # Solo se compara con los nombres de la misma inicial
+        start, end = self._range(key[0])
+        candidates = list(dict.fromkeys(self._keys[start:end]))
+        close = difflib.get_close_matches(key, candidates, n=limit, cutoff=cutoff)
+        return [p for match in close for p in self._exact(match)]
+
+    @staticmethod
+    def _public(place):
+        return {
+            "lat": place['lat'],
+            "lon": place['lon'],
+            "name": place['name'],
+            "department": place['department'],
+            "country": 'Colombia',
+        }
+
+
+gazetteer = Gazetteer.load(GAZETTEER_PATH)
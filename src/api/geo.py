@@ -0,0 +1,103 @@
+import math
+from sqlalchemy import DDL, Column, Float, Integer, MetaData, Table, event, select
+from .models import db, Field
+
+"""
+Consultas espaciales sobre Field.latitude/longitude.
+
+- SQLite: índice R-tree (tabla virtual field_rtree) mantenido con triggers
+  en cada escritura de field; la caja de búsqueda se resuelve en el R-tree.
+- Otros motores: índice (user_id, latitude) y filtro de longitud sobre esa
+  franja.
+
+En ambos casos la caja es solo un prefiltro: la distancia exacta se
+comprueba con haversine.
+"""
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Solo para construir las consultas: la tabla la crean los DDL de abajo
+field_rtree = Table(
+    'field_rtree', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('min_lat', Float), Column('max_lat', Float),
+    Column('min_lon', Float), Column('max_lon', Float),
+    Column('user_id', Integer),
+)
+
+RTREE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS field_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon, +user_id)",
+    "CREATE TRIGGER IF NOT EXISTS field_rtree_ai AFTER INSERT ON field "
+    "WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN "
+    "INSERT INTO field_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude, new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS field_rtree_au AFTER UPDATE OF latitude, longitude, user_id ON field BEGIN "
+    "DELETE FROM field_rtree WHERE id = old.id; "
+    "INSERT INTO field_rtree SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude, new.user_id "
+    "WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS field_rtree_ad AFTER DELETE ON field BEGIN "
+    "DELETE FROM field_rtree WHERE id = old.id; END",
+]
+
+for _statement in RTREE_DDL:
+    event.listen(Field.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+# La tabla virtual no está en db.metadata: drop_all no la borraría y el
+# siguiente create_all chocaría con los ids viejos que quedan en ella
+event.listen(Field.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS field_rtree").execute_if(dialect='sqlite'))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia en km sobre la esfera terrestre"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bbox_around(lat, lon, radius_km):
+    """Caja (min_lat, min_lon, max_lat, max_lon) que contiene el círculo pedido"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return max(-90.0, lat - dlat), max(-180.0, lon - dlon), min(90.0, lat + dlat), min(180.0, lon + dlon)
+
+
+def bbox_query(user_id, min_lat, min_lon, max_lat, max_lon):
+    """Candidatos dentro de la caja, usando el índice espacial disponible"""
+    query = Field.query.filter(Field.user_id == user_id)
+    if db.session.get_bind().dialect.name == 'sqlite':
+        ids = select(field_rtree.c.id).where(
+            field_rtree.c.min_lat <= max_lat, field_rtree.c.max_lat >= min_lat,
+            field_rtree.c.min_lon <= max_lon, field_rtree.c.max_lon >= min_lon,
+            field_rtree.c.user_id == int(user_id)
+        )
+        # Sin filtros sobre latitude aquí: el planificador elegiría la franja del
+        # B-tree en lugar de recorrer el R-tree
+        return query.filter(Field.id.in_(ids))
+    return query.filter(
+        Field.latitude.between(min_lat, max_lat),
+        Field.longitude.between(min_lon, max_lon)
+    )
+
+
+def fields_in_bbox(user_id, min_lat, min_lon, max_lat, max_lon):
+    """Campos del usuario dentro de la caja"""
+    # El R-tree guarda float32 redondeado hacia afuera: se confirma con los valores reales
+    return [
+        field for field in bbox_query(user_id, min_lat, min_lon, max_lat, max_lon)
+        if min_lat <= field.latitude <= max_lat and min_lon <= field.longitude <= max_lon
+    ]
+
+
+def fields_nearby(user_id, lat, lon, radius_km):
+    """Campos a menos de radius_km, ordenados por distancia: [(campo, distancia_km)]"""
+    results = []
+    for field in fields_in_bbox(user_id, *bbox_around(lat, lon, radius_km)):
+        distance = haversine_km(lat, lon, field.latitude, field.longitude)
+        if distance <= radius_km:
+            results.append((field, distance))
+    results.sort(key=lambda item: item[1])
+    return results
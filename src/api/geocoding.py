@@ -0,0 +1,99 @@
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+from .models import db, GeocodeCache
+from .cache import TTLCache, MISSING
+from .weather_client import WeatherServiceError, weather_client
+
+"""
+Geocodificación de nombres de ciudad con caché en dos niveles:
+
+1. LRU en memoria del proceso
+2. Tabla geocode_cache, compartida entre procesos y reinicios
+
+Las claves se normalizan (minúsculas, sin tildes ni espacios repetidos),
+así "Bogotá", "bogota" y " BOGOTA " comparten entrada. También se guardan
+los nombres que el servicio no encuentra, con un TTL más corto, para no
+repetir la consulta. Los errores de red no se guardan.
+"""
+
+# Los lugares no se mueven: TTL largo para los encontrados
+FOUND_TTL = timedelta(days=90)
+NOT_FOUND_TTL = timedelta(days=7)
+MEMORY_CACHE_SIZE = 2048
+
+_memory = TTLCache(MEMORY_CACHE_SIZE)
+
+
+def normalize_place(name):
+    """Clave de búsqueda: minúsculas, sin tildes y con espacios simples"""
+    folded = unicodedata.normalize('NFKD', name or '')
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', folded).strip().lower()
+
+
+def geocode(city):
+    """Coordenadas de una ciudad como {lat, lon, name, country}, o None si no existe"""
+    key = normalize_place(city)
+    if not key:
+        return None
+
+    result = _memory.get(key)
+    if result is not MISSING:
+        return result
+
+    now = datetime.utcnow()
+    entry = db.session.get(GeocodeCache, key)
+    if entry is not None and entry.expires_at > now:
+        result = entry.serialize()
+        _remember(key, result, entry.expires_at - now)
+        return result
+
+    result = _fetch(city.strip())
+    if result is MISSING:
+        # Error del servicio: no se guarda, el próximo intento vuelve a consultar
+        return None
+    ttl = FOUND_TTL if result else NOT_FOUND_TTL
+    _store(key, result, now + ttl)
+    _remember(key, result, ttl)
+    return result
+
+
+def _fetch(name):
+    """Consulta el servicio con el nombre original; MISSING si no respondió correctamente"""
+    try:
+        data = weather_client.geocode({"name": name, "count": 1, "language": "es", "format": "json"})
+    except WeatherServiceError:
+        return MISSING
+    results = data.get('results')
+    if not results:
+        return None
+    return {
+        "lat": results[0]['latitude'],
+        "lon": results[0]['longitude'],
+        "name": results[0]['name'],
+        "country": results[0].get('country')
+    }
+
+
+def _remember(key, result, ttl):
+    _memory.set(key, result, ttl.total_seconds())
+
+
+def _store(key, result, expires_at):
+    """Guarda el resultado en geocode_cache; otro proceso pudo haberlo guardado antes"""
+    result = result or {}
+    try:
+        db.session.merge(GeocodeCache(
+            key=key,
+            found=bool(result),
+            name=result.get('name'),
+            country=result.get('country'),
+            latitude=result.get('lat'),
+            longitude=result.get('lon'),
+            expires_at=expires_at
+        ))
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
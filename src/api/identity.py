@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from functools import wraps
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from .models import db, User
+from .cache import TTLCache, MISSING
+
+"""
+Identidad del usuario por petición.
+
+El token se verifica una sola vez por petición (en check_jwt o en
+identity_required, lo que ocurra primero) y el resultado queda en
+g.current_user. El rol y el estado del usuario se leen de una caché en
+memoria con TTL, que se invalida al actualizar o borrar el User en este
+proceso; en los demás procesos el cambio se ve al vencer el TTL.
+"""
+
+USER_STATUS_TTL = 60
+USER_STATUS_CACHE_SIZE = 4096
+
+_status = TTLCache(USER_STATUS_CACHE_SIZE)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    email: str = None
+
+    @property
+    def role(self):
+        status = user_status(self.id)
+        return status[0] if status else None
+
+    @property
+    def is_active(self):
+        """El usuario del token todavía existe"""
+        return user_status(self.id) is not None
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+
+def user_status(user_id):
+    """(rol,) del usuario desde la caché, o None si no existe"""
+    status = _status.get(user_id)
+    if status is MISSING:
+        row = db.session.query(User.role).filter(User.id == user_id).first()
+        status = (row.role,) if row else None
+        _status.set(user_id, status, USER_STATUS_TTL)
+    return status
+
+
+def load_identity():
+    """Verifica el token (una vez por petición) y deja el usuario en g.current_user"""
+    if 'current_user' in g:
+        return g.current_user
+    verify_jwt_in_request()
+    identity = get_jwt_identity()
+    if isinstance(identity, dict):
+        g.current_user = CurrentUser(int(identity['id']), identity.get('email'))
+    else:
+        g.current_user = CurrentUser(int(identity))
+    return g.current_user
+
+
+def identity_required(view):
+    """Como jwt_required(), sin volver a verificar el token si check_jwt ya lo hizo"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        load_identity()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_user_status(mapper, connection, target):
+    _status.delete(target.id)
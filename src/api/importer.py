@@ -0,0 +1,87 @@
+import csv
+import io
+from sqlalchemy import insert
+from .models import db, Field, Inventory, Equipment, VERSIONED_RESOURCES, increment_data_versions
+from .validators import inventory_values, equipment_values
+
+"""
+Importación de CSV (por ejemplo la hoja de un proveedor exportada desde Excel).
+
+El archivo se lee fila a fila desde el stream, cada fila se valida con las
+mismas reglas que add_inventory_item/add_equipment y las filas válidas se
+insertan en lotes con un INSERT multi-fila. Nunca se carga el archivo entero
+en memoria: solo el lote en curso.
+"""
+
+IMPORT_BATCH_SIZE = 1000
+# Máximo de errores detallados que se devuelven (el contador no tiene tope)
+MAX_ERROR_SAMPLES = 100
+
+IMPORT_VALIDATORS = {
+    Inventory: inventory_values,
+    Equipment: equipment_values,
+}
+
+
+def open_csv(binary_stream, delimiter=None):
+    """DictReader incremental sobre un stream binario; detecta ',' o ';' si no se indica"""
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    header = text.readline()
+    if delimiter is None:
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+    fieldnames = [name.strip().lower() for name in next(csv.reader([header], delimiter=delimiter), [])]
+    return csv.DictReader(text, fieldnames=fieldnames, delimiter=delimiter)
+
+
+def import_rows(model, rows, user_id, on_progress=None):
+    """
+    Valida e inserta las filas de un iterable de dicts. Devuelve un resumen
+    con filas procesadas, insertadas y errores. on_progress(resumen) se llama
+    tras cada lote insertado.
+    """
+    to_values = IMPORT_VALIDATORS[model]
+    # Los campos del usuario son pocos: se cargan una vez para validar field_id/field_name
+    fields = db.session.query(Field.id, Field.name).filter(Field.user_id == user_id).all()
+    field_ids = {field.id for field in fields}
+    field_names = {field.name.strip().lower(): field.id for field in fields}
+
+    summary = {"processed": 0, "inserted": 0, "error_count": 0, "errors": []}
+    batch = []
+
+    def flush():
+        db.session.execute(insert(model), batch)
+        increment_data_versions(db.session.connection(),
+                                {(user_id, resource) for resource in VERSIONED_RESOURCES[model]})
+        db.session.commit()
+        summary["inserted"] += len(batch)
+        batch.clear()
+        if on_progress:
+            on_progress(summary)
+
+    # La fila 1 es la cabecera
+    for line, row in enumerate(rows, start=2):
+        summary["processed"] += 1
+        try:
+            data = {key: value.strip() if isinstance(value, str) else value
+                    for key, value in row.items() if key}
+            data = {key: value for key, value in data.items() if value not in ('', None)}
+            if 'field_id' not in data and 'field_name' in data:
+                field_id = field_names.get(data.pop('field_name').lower())
+                if field_id is None:
+                    raise ValueError("La finca especificada no existe")
+                data['field_id'] = field_id
+            values = to_values(data)
+            if values.get('field_id') and values['field_id'] not in field_ids:
+                raise ValueError("La finca especificada no existe")
+            batch.append(dict(values, user_id=user_id))
+        except ValueError as e:
+            summary["error_count"] += 1
+            if len(summary["errors"]) < MAX_ERROR_SAMPLES:
+                summary["errors"].append({"line": line, "error": str(e)})
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+    return summary
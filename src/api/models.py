@@ -1,10 +1,32 @@
 from datetime import datetime
+from functools import lru_cache
+from flask import current_app, has_app_context
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import Integer, String, Text, Date, DateTime
+from sqlalchemy import Integer, String, Text, Date, DateTime, event
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 from src.api.database import db
 
 
+# Método por defecto si la app no define PASSWORD_HASH_METHOD (el de Werkzeug)
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+def password_hash_method():
+    """Método y costo de hash configurados, p. ej. "scrypt:16384:8:1" o "pbkdf2:sha256:600000" """
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_PASSWORD_HASH_METHOD
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+@lru_cache(maxsize=8)
+def password_hash_prefix(method):
+    """Parámetros completos que Werkzeug guarda para method ("pbkdf2" -> "pbkdf2:sha256:1000000")"""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
 # ======================
 # USER
 # ======================
@@ -27,11 +49,15 @@ class User(UserMixin, db.Model):
     staff = db.relationship('Staff', back_populates='user', cascade='all, delete-orphan')
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = generate_password_hash(password, password_hash_method())
 
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
+    def needs_rehash(self):
+        """El hash guardado usa otro método o costo que el configurado"""
+        return self.password.split('$', 1)[0] != password_hash_prefix(password_hash_method())
+
     def serialize(self):
         return {
             "id": self.id,
@@ -48,6 +74,15 @@ class User(UserMixin, db.Model):
 # ======================
 class Field(db.Model):
     __tablename__ = 'field'
+    __table_args__ = (
+        db.Index('ix_field_user_id_id', 'user_id', 'id'),
+        db.Index('ix_field_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_field_user_id_name', 'user_id', 'name'),
+        db.Index('ix_field_user_id_status', 'user_id', 'status'),
+        db.Index('ix_field_user_id_crop', 'user_id', 'crop'),
+        db.Index('ix_field_user_id_city', 'user_id', 'city'),
+        db.Index('ix_field_user_id_latitude', 'user_id', 'latitude'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -103,8 +138,26 @@ class Field(db.Model):
 # ======================
 # INVENTORY
 # ======================
+
+# Stock bajo: hay un mínimo definido y la cantidad no lo supera. El índice
+# parcial usa exactamente estas condiciones (con literales, no parámetros)
+# para que SQLite y Postgres puedan aplicarlo a las consultas de alertas.
+LOW_STOCK_SQL = 'min_quantity > 0 AND quantity <= min_quantity'
+
+
 class Inventory(db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.Index('ix_inventory_low_stock', 'user_id', 'id',
+                 sqlite_where=db.text(LOW_STOCK_SQL), postgresql_where=db.text(LOW_STOCK_SQL)),
+        db.Index('ix_inventory_user_id_id', 'user_id', 'id'),
+        db.Index('ix_inventory_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_inventory_user_id_name', 'user_id', 'name'),
+        db.Index('ix_inventory_user_id_category', 'user_id', 'category'),
+        db.Index('ix_inventory_user_id_supplier', 'user_id', 'supplier'),
+        db.Index('ix_inventory_user_id_unit', 'user_id', 'unit'),
+        db.Index('ix_inventory_field_id', 'field_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -116,8 +169,8 @@ class Inventory(db.Model):
     notes = db.Column(db.Text) 
     field_id = db.Column(db.Integer, db.ForeignKey('field.id'))
 
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relación con usuario
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -125,6 +178,11 @@ class Inventory(db.Model):
 
     field = db.relationship('Field', back_populates='inventory_list')
 
+    @classmethod
+    def low_stock(cls):
+        """Condición SQL equivalente a LOW_STOCK_SQL"""
+        return db.and_(cls.min_quantity > db.literal_column('0'), cls.quantity <= cls.min_quantity)
+
     def serialize(self):
         return {
             "id": self.id,
@@ -145,6 +203,16 @@ class Inventory(db.Model):
 # ======================
 class Equipment(db.Model):
     __tablename__ = 'equipment'
+    __table_args__ = (
+        db.Index('ix_equipment_user_id_id', 'user_id', 'id'),
+        db.Index('ix_equipment_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_equipment_user_id_name', 'user_id', 'name'),
+        db.Index('ix_equipment_user_id_status', 'user_id', 'status'),
+        db.Index('ix_equipment_user_id_type', 'user_id', 'type'),
+        db.Index('ix_equipment_user_id_brand', 'user_id', 'brand'),
+        db.Index('ix_equipment_user_id_next_maintenance', 'user_id', 'next_maintenance'),
+        db.Index('ix_equipment_field_id', 'field_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -193,6 +261,15 @@ class Equipment(db.Model):
 # ======================
 class Staff(db.Model):
     __tablename__ = 'staff'
+    __table_args__ = (
+        db.Index('ix_staff_user_id_id', 'user_id', 'id'),
+        db.Index('ix_staff_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_staff_user_id_name', 'user_id', 'name'),
+        db.Index('ix_staff_user_id_status', 'user_id', 'status'),
+        db.Index('ix_staff_user_id_position', 'user_id', 'position'),
+        db.Index('ix_staff_user_id_email', 'user_id', 'email'),
+        db.Index('ix_staff_field_id', 'field_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -233,3 +310,140 @@ class Staff(db.Model):
         }
 
 
+
+
+# ======================
+# DATA VERSION
+# ======================
+class DataVersion(db.Model):
+    """Contador de cambios por usuario y recurso, usado para los ETags"""
+    __tablename__ = 'data_version'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    resource = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ======================
+# GEOCODE CACHE
+# ======================
+class GeocodeCache(db.Model):
+    """Resultados del geocodificador por nombre normalizado, incluidos los no encontrados"""
+    __tablename__ = 'geocode_cache'
+
+    key = db.Column(db.String(120), primary_key=True)  # Nombre sin tildes, en minúsculas
+    found = db.Column(db.Boolean, nullable=False)
+    name = db.Column(db.String(120))
+    country = db.Column(db.String(80))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def serialize(self):
+        if not self.found:
+            return None
+        return {
+            "lat": self.latitude,
+            "lon": self.longitude,
+            "name": self.name,
+            "country": self.country
+        }
+
+
+# ======================
+# FORECAST CACHE
+# ======================
+class ForecastCache(db.Model):
+    """Última respuesta del pronóstico por celda de coordenadas redondeadas"""
+    __tablename__ = 'forecast_cache'
+
+    key = db.Column(db.String(40), primary_key=True)  # "lat,lon" redondeados
+    data = db.Column(db.Text, nullable=False)  # JSON de Open-Meteo
+    fetched_at = db.Column(db.DateTime, nullable=False)
+
+
+# Nombre de cada recurso en la API -> modelo
+RESOURCE_MODELS = {
+    'fields': Field,
+    'inventory': Inventory,
+    'equipment': Equipment,
+    'staff': Staff,
+}
+
+
+# Recurso de cada modelo versionado. Los cambios en un campo también
+# invalidan los recursos que muestran su nombre o lo embeben.
+VERSIONED_RESOURCES = {
+    Field: ('fields', 'inventory', 'equipment', 'staff'),
+    Inventory: ('inventory',),
+    Equipment: ('equipment',),
+    Staff: ('staff',),
+}
+
+
+@event.listens_for(Session, 'before_flush')
+def collect_changed_resources(session, flush_context, instances):
+    changed = session.info.setdefault('changed_resources', set())
+    deleted_users = session.info.setdefault('deleted_users', set())
+    deleted_users.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        resources = VERSIONED_RESOURCES.get(type(obj))
+        if not resources or obj.user_id is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        changed.update((obj.user_id, resource) for resource in resources)
+
+
+@event.listens_for(Session, 'after_flush')
+def bump_data_versions(session, flush_context):
+    changed = session.info.pop('changed_resources', None) or set()
+    deleted_users = session.info.pop('deleted_users', None)
+    if deleted_users:
+        # Los datos de un usuario borrado se van con él: nada que versionar.
+        # Con FKs activas el ON DELETE CASCADE ya borró sus contadores.
+        changed = {(user_id, resource) for user_id, resource in changed if user_id not in deleted_users}
+        table = DataVersion.__table__
+        session.connection().execute(table.delete().where(table.c.user_id.in_(deleted_users)))
+    if changed:
+        increment_data_versions(session.connection(), changed)
+
+
+def increment_data_versions(connection, changed):
+    """
+    Incrementa los contadores de los pares (user_id, resource). Las escrituras
+    masivas (insert/update/delete sin pasar por la sesión) deben llamarla a mano.
+    """
+    table = DataVersion.__table__
+    rows = [{"user_id": user_id, "resource": resource, "version": 1} for user_id, resource in sorted(changed)]
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # Upsert atómico: dos primeras escrituras simultáneas no chocan por la PK
+        insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        statement = insert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.resource],
+            set_={"version": table.c.version + 1}
+        ), rows)
+        return
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.user_id == row['user_id'], table.c.resource == row['resource'])
+            .values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def data_versions_query(user_id, resources):
+    """Consulta de los contadores que usan los ETags en cada GET"""
+    return db.session.query(DataVersion.resource, DataVersion.version).filter(
+        DataVersion.user_id == user_id, DataVersion.resource.in_(resources)
+    )
+
+
+def get_data_versions(user_id, resources):
+    """Versión actual de cada recurso del usuario (0 si nunca cambió)"""
+    versions = dict(data_versions_query(user_id, resources).all())
+    return [versions.get(resource, 0) for resource in resources]
@@ -1,12 +1,29 @@
-from flask import Flask, request, jsonify, Blueprint
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request, create_access_token
+from flask import Flask, request, jsonify, Blueprint, Response, stream_with_context, g
+from flask_jwt_extended import create_access_token
 from werkzeug.exceptions import Unauthorized
-from datetime import datetime
-import requests
-from .models import db, User, Field, Inventory, Equipment, Staff
+from datetime import datetime, timedelta
+import csv
+import logging
+import io
+import json
+from .models import db, User, Field, Inventory, Equipment, Staff, RESOURCE_MODELS
+from .utils import APIException, get_page_params, keyset_page, encode_cursor, decode_cursor, MAX_PAGE_SIZE
+from .fieldsets import FIELDSETS, get_fieldset, sparse_query, row_to_dict
+from .etags import etag_versioned
+from .identity import identity_required, load_identity
+from .batch import BatchError, validate_batch, apply_batch
+from .importer import IMPORT_VALIDATORS, open_csv, import_rows
+from .filters import get_filters, get_sort, sort_query, with_sort_key
+from .search import SEARCH_COLUMNS, search
+from .geo import fields_in_bbox, fields_nearby
+from .geocoding import geocode
+from .gazetteer import gazetteer
+from .forecast import ForecastError, get_forecast, get_forecasts, grid_key, summarize_forecast
 from werkzeug.security import check_password_hash
 
 
+logger = logging.getLogger(__name__)
+
 # Crear el Blueprint 'api'
 api = Blueprint('api', __name__)
 
@@ -29,11 +46,41 @@ def check_jwt():
 
     # Para rutas protegidas, verificar JWT
     try:
-        verify_jwt_in_request()
+        load_identity()
     except Exception as e:
-        print(f"DEBUG: Error en JWT: {str(e)}")
+        logger.debug("jwt rechazado", extra={"path": request.path, "error": str(e)})
         raise Unauthorized("Missing Authorization Header")
 
+@api.errorhandler(APIException)
+def handle_api_exception(error):
+    return jsonify({"msg": error.message, **(error.payload or {})}), error.status_code
+
+# ============================
+# Consultas de los listados
+# ============================
+# check-query-plans (commands.py) ejecuta EXPLAIN sobre estas mismas consultas
+
+def list_query(model, fieldset=None):
+    """
+    Consulta base de un listado y su serializador: proyección parcial con
+    ?fields=, o el modelo completo con el campo asociado cargado en la misma
+    consulta (evita N+1 en serialize).
+    """
+    if fieldset:
+        return sparse_query(model, fieldset), row_to_dict
+    if model is Inventory:
+        return Inventory.query.options(
+            db.joinedload(Inventory.field).load_only(Field.id, Field.name)
+        ), Inventory.serialize
+    if model is Staff:
+        return Staff.query.options(
+            db.joinedload(Staff.field).load_only(Field.id, Field.name)
+        ), Staff.serialize
+    if model is Equipment:
+        return Equipment.query.options(db.joinedload(Equipment.field)), serialize_equipment
+    return model.query, model.serialize
+
+
 # ============================
 # Rutas
 # ============================
@@ -91,10 +138,7 @@ def register():
 # Ruta para iniciar sesión (SIN TOKEN)
 @api.route('/login', methods=['POST', 'OPTIONS'])
 def login():
-    print(f"DEBUG: Login endpoint llamado con método: {request.method}")
-    
     if request.method == 'OPTIONS':
-        print("DEBUG: Procesando OPTIONS request")
         response = jsonify({'message': 'Preflight check passed'})
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
@@ -103,25 +147,25 @@ def login():
         return response
 
     try:
-        print("DEBUG: Procesando POST request")
         data = request.get_json()
-        print(f"DEBUG: Datos recibidos: {data}")
         
         # Validar campos requeridos
         if not data or 'correo' not in data or 'contraseña' not in data:
-            print("DEBUG: Faltan campos requeridos")
             return jsonify({"msg": "Correo y contraseña son requeridos"}), 400
 
         # Buscar usuario
         user = User.query.filter_by(email=data['correo']).first()
-        print(f"DEBUG: Usuario encontrado: {user is not None}")
         
         # Verificar usuario y contraseña
         if not user or not user.check_password(data['contraseña']):
-            print("DEBUG: Credenciales incorrectas")
+            logger.info("login fallido", extra={"user_found": user is not None})
             return jsonify({"msg": "Correo o contraseña incorrectos"}), 401
         
-        print("DEBUG: Credenciales correctas, generando token")
+        # Rehash transparente si cambió el método o el costo configurado
+        if user.needs_rehash():
+            user.set_password(data['contraseña'])
+            db.session.commit()
+
         # Generar token JWT
         access_token = create_access_token(identity={
             'id': user.id,
@@ -143,31 +187,40 @@ def login():
         # Configurar headers CORS
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
-        print("DEBUG: Respuesta de login enviada")
+        logger.info("login", extra={"user_id": user.id})
         return response, 200
 
     except Exception as e:
-        print(f"DEBUG: Error en login: {str(e)}")
+        logger.exception("error en login")
         return jsonify({"msg": "Error al iniciar sesión", "error": str(e)}), 500
 
 
 # Ruta para obtener todos los usuarios (CON TOKEN + ADMIN)
 @api.route('/users', methods=['GET'])
-@jwt_required()
+@identity_required
 def get_users():
+    page = get_page_params(request.args)
+    fieldset = get_fieldset(request.args, User)
     try:
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
-        current_user_obj = User.query.get(current_user_id)
-
-        if not current_user_obj:
+        # Rol desde la caché de identidad, sin consultar la base de datos
+        if not g.current_user.is_active:
             return jsonify({"msg": "Usuario no encontrado"}), 404
 
-        if current_user_obj.role != 'admin':
+        if not g.current_user.is_admin:
             return jsonify({"msg": "No autorizado"}), 403
 
-        users = User.query.all()
-        users_list = [user.serialize() for user in users]
+        query, serialize = list_query(User, fieldset)
+
+        if page:
+            users, next_cursor = keyset_page(query, User.id, *page)
+            return jsonify({
+                "users": [serialize(user) for user in users],
+                "next_cursor": next_cursor,
+                "limit": page[0]
+            }), 200
+
+        users = query.all()
+        users_list = [serialize(user) for user in users]
 
         return jsonify(users_list), 200
 
@@ -178,20 +231,100 @@ def get_users():
         }), 500
 #campos de cultivo
 @api.route('/fields', methods=['GET'])
-@jwt_required()
+@identity_required
+@etag_versioned('fields')
 def get_fields():
+    sort = get_sort(request.args, Field)
+    page = get_page_params(request.args, sort)
+    fieldset = with_sort_key(get_fieldset(request.args, Field), sort)
+    filters = get_filters(request.args, Field)
     try:
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
-        fields = Field.query.filter_by(user_id=current_user_id).all()
+        current_user_id = g.current_user.id
+        query, serialize = list_query(Field, fieldset)
+        query = query.filter(Field.user_id == current_user_id, *filters)
+        if page:
+            fields, next_cursor = keyset_page(query, Field.id, *page, sort=sort)
+            return jsonify({
+                "fields": [serialize(field) for field in fields],
+                "next_cursor": next_cursor,
+                "limit": page[0]
+            }), 200
+        fields = sort_query(query, Field.id, sort).all()
         return jsonify({
-            "fields": [field.serialize() for field in fields]
+            "fields": [serialize(field) for field in fields]
         }), 200
     except Exception as e:
         return jsonify({"msg": "Error al obtener los campos", "error": str(e)}), 500
 
+# Límites de las consultas espaciales
+MAX_NEARBY_RADIUS_KM = 500
+
+
+def float_arg(name, minimum, maximum):
+    """Lee un parámetro numérico requerido dentro de [minimum, maximum]"""
+    try:
+        value = float(request.args[name])
+    except (KeyError, ValueError):
+        raise APIException(f"El parámetro {name} es requerido y debe ser numérico", status_code=400)
+    if not minimum <= value <= maximum:
+        raise APIException(f"El parámetro {name} debe estar entre {minimum} y {maximum}", status_code=400)
+    return value
+
+
+@api.route('/fields/nearby', methods=['GET'])
+@identity_required
+@etag_versioned('fields')
+def get_fields_nearby():
+    """Campos a menos de radius_km de (lat, lon), ordenados por distancia"""
+    lat = float_arg('lat', -90, 90)
+    lon = float_arg('lon', -180, 180)
+    radius_km = float_arg('radius_km', 0, MAX_NEARBY_RADIUS_KM)
+    try:
+        current_user_id = g.current_user.id
+        results = fields_nearby(current_user_id, lat, lon, radius_km)
+        return jsonify({
+            "fields": [{**field.serialize(), "distance_km": round(distance, 3)} for field, distance in results]
+        }), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al buscar campos cercanos", "error": str(e)}), 500
+
+
+@api.route('/fields/bbox', methods=['GET'])
+@identity_required
+@etag_versioned('fields')
+def get_fields_bbox():
+    """Campos dentro de la caja min_lat, min_lon, max_lat, max_lon"""
+    min_lat = float_arg('min_lat', -90, 90)
+    max_lat = float_arg('max_lat', min_lat, 90)
+    min_lon = float_arg('min_lon', -180, 180)
+    max_lon = float_arg('max_lon', min_lon, 180)
+    try:
+        current_user_id = g.current_user.id
+        fields = fields_in_bbox(current_user_id, min_lat, min_lon, max_lat, max_lon)
+        return jsonify({"fields": [field.serialize() for field in fields]}), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al buscar campos en el área", "error": str(e)}), 500
+
+@api.route('/fields/<int:field_id>', methods=['GET'])
+@identity_required
+@etag_versioned('fields')
+def get_field(field_id):
+    fieldset = get_fieldset(request.args, Field)
+    try:
+        current_user_id = g.current_user.id
+        if fieldset:
+            query, serialize = sparse_query(Field, fieldset), row_to_dict
+        else:
+            query, serialize = Field.query, Field.serialize
+        field = query.filter(Field.id == field_id, Field.user_id == current_user_id).first()
+        if not field:
+            return jsonify({"msg": "Campo no encontrado"}), 404
+        return jsonify(serialize(field)), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el campo", "error": str(e)}), 500
+
 @api.route('/fields', methods=['POST'])
-@jwt_required()
+@identity_required
 def create_field():
     data = request.get_json()
     
@@ -200,8 +333,7 @@ def create_field():
         if not data.get(field):
             return jsonify({"msg": f"El campo {field} es requerido"}), 400
     try:
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
+        current_user_id = g.current_user.id
         new_field = Field(
             name=data['name'],
             crop=data['crop'],
@@ -222,7 +354,7 @@ def create_field():
         return jsonify({"msg": str(e)}), 500
 
 @api.route('/fields/<int:field_id>', methods=['PUT'])
-@jwt_required()
+@identity_required
 def update_field(field_id):
     field = Field.query.get(field_id)
     if not field:
@@ -244,7 +376,7 @@ def update_field(field_id):
         db.session.rollback()
         return jsonify({"msg": str(e)}), 500
 @api.route('/fields/<int:field_id>', methods=['DELETE'])
-@jwt_required()
+@identity_required
 def delete_field(field_id):
     field = Field.query.get(field_id)
     if not field:
@@ -260,27 +392,84 @@ def delete_field(field_id):
 # Rutas para el inventario
 # Obtener todo el inventario
 @api.route('/inventory', methods=['GET'])
-@jwt_required()
+@identity_required
+@etag_versioned('inventory')
 def get_inventory():
+    sort = get_sort(request.args, Inventory)
+    page = get_page_params(request.args, sort)
+    fieldset = with_sort_key(get_fieldset(request.args, Inventory), sort)
+    filters = get_filters(request.args, Inventory)
     try:
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
-        inventory_items = Inventory.query.filter_by(user_id=current_user_id).all()
+        current_user_id = g.current_user.id
+        query, serialize = list_query(Inventory, fieldset)
+        query = query.filter(Inventory.user_id == current_user_id, *filters)
+        if page:
+            inventory_items, next_cursor = keyset_page(query, Inventory.id, *page, sort=sort)
+            return jsonify({
+                "msg": "Inventario obtenido exitosamente",
+                "inventory": [serialize(item) for item in inventory_items],
+                "next_cursor": next_cursor,
+                "limit": page[0]
+            }), 200
+        inventory_items = sort_query(query, Inventory.id, sort).all()
         return jsonify({
             "msg": "Inventario obtenido exitosamente",
-            "inventory": [item.serialize() for item in inventory_items]
+            "inventory": [serialize(item) for item in inventory_items]
         }), 200
     except Exception as e:
         return jsonify({"msg": "Error al obtener inventario", "error": str(e)}), 500
 
+# Obtener un ítem del inventario
+@api.route('/inventory/<int:item_id>', methods=['GET'])
+@identity_required
+@etag_versioned('inventory')
+def get_inventory_item(item_id):
+    fieldset = get_fieldset(request.args, Inventory)
+    try:
+        current_user_id = g.current_user.id
+        if fieldset:
+            query, serialize = sparse_query(Inventory, fieldset), row_to_dict
+        else:
+            query = Inventory.query.options(db.joinedload(Inventory.field).load_only(Field.id, Field.name))
+            serialize = Inventory.serialize
+        item = query.filter(Inventory.id == item_id, Inventory.user_id == current_user_id).first()
+        if not item:
+            return jsonify({"msg": "Ítem no encontrado"}), 404
+        return jsonify(serialize(item)), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el ítem", "error": str(e)}), 500
+
+# Ítems con stock bajo
+@api.route('/inventory/low-stock', methods=['GET'])
+@identity_required
+@etag_versioned('inventory')
+def get_low_stock():
+    """Ítems cuya cantidad no supera el mínimo, leídos del índice parcial de alertas"""
+    page = get_page_params(request.args)
+    fieldset = get_fieldset(request.args, Inventory)
+    try:
+        current_user_id = g.current_user.id
+        query, serialize = list_query(Inventory, fieldset)
+        query = query.filter(Inventory.user_id == current_user_id, Inventory.low_stock())
+        if page:
+            items, next_cursor = keyset_page(query, Inventory.id, *page)
+            return jsonify({
+                "inventory": [serialize(item) for item in items],
+                "next_cursor": next_cursor,
+                "limit": page[0]
+            }), 200
+        items = query.order_by(Inventory.id).all()
+        return jsonify({"inventory": [serialize(item) for item in items]}), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el stock bajo", "error": str(e)}), 500
+
 # Agregar nuevo ítem al inventario
 @api.route('/inventory', methods=['POST'])
-@jwt_required()
+@identity_required
 def add_inventory_item():
     try:
         data = request.get_json()
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
+        current_user_id = g.current_user.id
         
         # Validar campos requeridos
         required_fields = ['name', 'category', 'quantity', 'unit']
@@ -310,7 +499,7 @@ def add_inventory_item():
 
 # Actualizar ítem de inventario
 @api.route('/inventory/<int:item_id>', methods=['PUT'])
-@jwt_required()
+@identity_required
 def update_inventory_item(item_id):
     try:
         item = Inventory.query.get(item_id)
@@ -338,7 +527,7 @@ def update_inventory_item(item_id):
 
 # Eliminar ítem de inventario
 @api.route('/inventory/<int:item_id>', methods=['DELETE'])
-@jwt_required()
+@identity_required
 def delete_inventory_item(item_id):
     try:
         item = Inventory.query.get(item_id)
@@ -354,27 +543,152 @@ def delete_inventory_item(item_id):
         return jsonify({"msg": "Error al eliminar el ítem", "error": str(e)}), 500
 
 # Equipos
+def serialize_equipment(eq):
+    """Equipo con el campo asociado embebido"""
+    return {
+        **eq.serialize(),
+        'field': eq.field.serialize() if eq.field else None
+    }
+
 @api.route('/equipment', methods=['GET'])
-@jwt_required()
+@identity_required
+@etag_versioned('equipment')
 def get_equipment():
+    sort = get_sort(request.args, Equipment)
+    page = get_page_params(request.args, sort)
+    fieldset = with_sort_key(get_fieldset(request.args, Equipment), sort)
+    filters = get_filters(request.args, Equipment)
     try:
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
-        equipment = Equipment.query.filter_by(user_id=current_user_id).options(db.joinedload(Equipment.field)).all()
-        return jsonify([{
-            **eq.serialize(),
-            'field': eq.field.serialize() if eq.field else None
-        } for eq in equipment])
+        current_user_id = g.current_user.id
+        query, serialize = list_query(Equipment, fieldset)
+        query = query.filter(Equipment.user_id == current_user_id, *filters)
+        if page:
+            equipment, next_cursor = keyset_page(query, Equipment.id, *page, sort=sort)
+        else:
+            equipment = sort_query(query, Equipment.id, sort).all()
+        equipment_list = [serialize(eq) for eq in equipment]
+        if page:
+            return jsonify({
+                "equipment": equipment_list,
+                "next_cursor": next_cursor,
+                "limit": page[0]
+            })
+        return jsonify(equipment_list)
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el equipo", "error": str(e)}), 500
+
+# Rango máximo (en días) del calendario de mantenimiento
+MAINTENANCE_MAX_RANGE_DAYS = 366
+# Máximo de equipos vencidos antes de "from" que se listan aparte
+MAINTENANCE_OVERDUE_LIMIT = 100
+
+
+def maintenance_item(row, now):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "status": row.status,
+        "field_id": row.field_id,
+        "field_name": row.field_name,
+        "next_maintenance": row.next_maintenance.isoformat(),
+        "last_maintenance": row.last_maintenance.isoformat() if row.last_maintenance else None,
+        "overdue": row.next_maintenance < now
+    }
+
+
+def maintenance_queries(user_id, start, end, now):
+    """Consultas del calendario de mantenimiento entre start y end (incluido)"""
+    columns = db.session.query(
+        Equipment.id, Equipment.name, Equipment.status, Equipment.field_id,
+        Field.name.label('field_name'), Equipment.next_maintenance, Equipment.last_maintenance
+    ).outerjoin(Field, Equipment.field_id == Field.id)
+    return {
+        # Escaneo por rango sobre el índice (user_id, next_maintenance); "to" incluye todo el día
+        "rows": columns.filter(
+            Equipment.user_id == user_id,
+            Equipment.next_maintenance >= start,
+            Equipment.next_maintenance < end + timedelta(days=1)
+        ).order_by(Equipment.next_maintenance, Equipment.id),
+        # Vencidos antes del rango pedido, para que no queden ocultos
+        "overdue_before": columns.filter(
+            Equipment.user_id == user_id,
+            Equipment.next_maintenance < min(start, now)
+        ).order_by(Equipment.next_maintenance, Equipment.id).limit(MAINTENANCE_OVERDUE_LIMIT),
+        "overdue_count": db.session.query(db.func.count(Equipment.id)).filter(
+            Equipment.user_id == user_id,
+            Equipment.next_maintenance < now
+        ),
+    }
+
+
+
+@api.route('/equipment/maintenance', methods=['GET'])
+@identity_required
+@etag_versioned('equipment')
+def get_maintenance_calendar():
+    """Calendario de mantenimientos entre from y to (YYYY-MM-DD), agrupado por día"""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d') if request.args.get('from') else today
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d') if request.args.get('to') else start + timedelta(days=30)
+    except ValueError:
+        return jsonify({"msg": "Las fechas deben tener formato YYYY-MM-DD"}), 400
+    if end < start or (end - start).days > MAINTENANCE_MAX_RANGE_DAYS:
+        return jsonify({"msg": f"El rango debe ser válido y de máximo {MAINTENANCE_MAX_RANGE_DAYS} días"}), 400
+
+    try:
+        current_user_id = g.current_user.id
+        now = datetime.utcnow()
+        queries = maintenance_queries(current_user_id, start, end, now)
+        rows = queries["rows"].all()
+
+        days = []
+        for row in rows:
+            day = row.next_maintenance.date().isoformat()
+            if not days or days[-1]["date"] != day:
+                days.append({"date": day, "equipment": []})
+            days[-1]["equipment"].append(maintenance_item(row, now))
+
+        overdue_before = queries["overdue_before"].all()
+        overdue_count = queries["overdue_count"].scalar()
+
+        return jsonify({
+            "from": start.date().isoformat(),
+            "to": end.date().isoformat(),
+            "days": days,
+            "total": len(rows),
+            "overdue_count": overdue_count,
+            "overdue_before": [maintenance_item(row, now) for row in overdue_before]
+        }), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el calendario de mantenimiento", "error": str(e)}), 500
+
+@api.route('/equipment/<int:equipment_id>', methods=['GET'])
+@identity_required
+@etag_versioned('equipment')
+def get_equipment_item(equipment_id):
+    """Obtener un equipo"""
+    fieldset = get_fieldset(request.args, Equipment)
+    try:
+        current_user_id = g.current_user.id
+        if fieldset:
+            query, serialize = sparse_query(Equipment, fieldset), row_to_dict
+        else:
+            query = Equipment.query.options(db.joinedload(Equipment.field))
+            serialize = serialize_equipment
+        equipment = query.filter(Equipment.id == equipment_id, Equipment.user_id == current_user_id).first()
+        if not equipment:
+            return jsonify({"msg": "Equipo no encontrado"}), 404
+        return jsonify(serialize(equipment)), 200
     except Exception as e:
         return jsonify({"msg": "Error al obtener el equipo", "error": str(e)}), 500
 
 @api.route('/equipment', methods=['POST'])
-@jwt_required()
+@identity_required
 def add_equipment():
     try:
         data = request.get_json()
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
+        current_user_id = g.current_user.id
         
         # Convertir fechas si existen
         date_fields = ['purchase_date', 'last_maintenance', 'next_maintenance']
@@ -419,7 +733,7 @@ def add_equipment():
         return jsonify({"msg": "Error al añadir el equipo", "error": str(e)}), 500
 
 @api.route('/equipment/<int:equipment_id>', methods=['PUT'])
-@jwt_required()
+@identity_required
 def update_equipment(equipment_id):
     """Actualizar equipo existente"""
     data = request.get_json()
@@ -453,7 +767,7 @@ def update_equipment(equipment_id):
         return jsonify({"msg": "Error al actualizar el equipo", "error": str(e)}), 500
 
 @api.route('/equipment/<int:equipment_id>', methods=['DELETE'])
-@jwt_required()
+@identity_required
 def delete_equipment(equipment_id):
     """Eliminar equipo"""
     try:
@@ -473,40 +787,67 @@ def delete_equipment(equipment_id):
 # ============================
 
 @api.route('/staff', methods=['GET'])
-@jwt_required()
+@identity_required
+@etag_versioned('staff')
 def get_staff():
     """Obtener todo el personal del usuario actual"""
+    sort = get_sort(request.args, Staff)
+    page = get_page_params(request.args, sort)
+    fieldset = with_sort_key(get_fieldset(request.args, Staff), sort)
+    filters = get_filters(request.args, Staff)
+    try:
+        current_user_id = g.current_user.id
+        query, serialize = list_query(Staff, fieldset)
+        query = query.filter(Staff.user_id == current_user_id, *filters)
+        if page:
+            staff_list, next_cursor = keyset_page(query, Staff.id, *page, sort=sort)
+            return jsonify({
+                "staff": [serialize(staff) for staff in staff_list],
+                "next_cursor": next_cursor,
+                "limit": page[0]
+            }), 200
+        staff_list = sort_query(query, Staff.id, sort).all()
+        return jsonify([serialize(staff) for staff in staff_list]), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el personal", "error": str(e)}), 500
+
+@api.route('/staff/<int:staff_id>', methods=['GET'])
+@identity_required
+@etag_versioned('staff')
+def get_staff_member(staff_id):
+    """Obtener un miembro del personal"""
+    fieldset = get_fieldset(request.args, Staff)
     try:
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
-        staff_list = Staff.query.filter_by(user_id=current_user_id).all()
-        return jsonify([staff.serialize() for staff in staff_list]), 200
+        current_user_id = g.current_user.id
+        if fieldset:
+            query, serialize = sparse_query(Staff, fieldset), row_to_dict
+        else:
+            query = Staff.query.options(db.joinedload(Staff.field).load_only(Field.id, Field.name))
+            serialize = Staff.serialize
+        staff = query.filter(Staff.id == staff_id, Staff.user_id == current_user_id).first()
+        if not staff:
+            return jsonify({"msg": "Personal no encontrado"}), 404
+        return jsonify(serialize(staff)), 200
     except Exception as e:
         return jsonify({"msg": "Error al obtener el personal", "error": str(e)}), 500
 
 @api.route('/staff', methods=['POST'])
-@jwt_required()
+@identity_required
 def create_staff():
     """Crear nuevo personal"""
     try:
         data = request.get_json()
-        print(f"DEBUG: Staff POST - Datos recibidos: {data}")
-        
-        current_user = get_jwt_identity()
-        current_user_id = current_user['id'] if isinstance(current_user, dict) else current_user
-        print(f"DEBUG: Staff POST - User ID: {current_user_id}")
+        current_user_id = g.current_user.id
         
         # Validar campos requeridos
         required_fields = ['name', 'email', 'position']
         for field in required_fields:
             if field not in data or not data[field]:
-                print(f"DEBUG: Staff POST - Campo faltante: {field}")
                 return jsonify({"msg": f"El campo {field} es requerido"}), 400
         
         # Verificar si el email ya existe para el usuario actual
         existing_staff = Staff.query.filter_by(email=data['email'], user_id=current_user_id).first()
         if existing_staff:
-            print(f"DEBUG: Staff POST - Email ya existe: {data['email']}")
             return jsonify({"msg": "Ya existe un personal con ese email"}), 400
         
         # Verificar que el field exista si se proporciona
@@ -541,7 +882,7 @@ def create_staff():
         return jsonify({"msg": "Error al crear el personal", "error": str(e)}), 500
 
 @api.route('/staff/<int:staff_id>', methods=['PUT'])
-@jwt_required()
+@identity_required
 def update_staff(staff_id):
     """Actualizar personal"""
     try:
@@ -578,7 +919,7 @@ def update_staff(staff_id):
         return jsonify({"msg": "Error al actualizar el personal", "error": str(e)}), 500
 
 @api.route('/staff/<int:staff_id>', methods=['DELETE'])
-@jwt_required()
+@identity_required
 def delete_staff(staff_id):
     """Eliminar personal"""
     try:
@@ -593,64 +934,339 @@ def delete_staff(staff_id):
         db.session.rollback()
         return jsonify({"msg": "Error al eliminar el personal", "error": str(e)}), 500
 
+# ============================
+# DASHBOARD
+# ============================
+
+# Ventana (en días) para considerar un mantenimiento como próximo
+MAINTENANCE_WINDOW_DAYS = 7
+# Máximo de ítems con stock bajo que se devuelven en el resumen
+LOW_STOCK_PREVIEW = 5
+
+
+def overview_queries(user_id, now):
+    """Consultas agregadas de /dashboard/overview"""
+    window_end = now + timedelta(days=MAINTENANCE_WINDOW_DAYS)
+    return {
+        # Campos: conteo y área por estado
+        "fields": db.session.query(
+            Field.status,
+            db.func.count(Field.id),
+            db.func.coalesce(db.func.sum(Field.area), 0)
+        ).filter(Field.user_id == user_id).group_by(Field.status),
+        # Personal: conteo y nómina por estado
+        "staff": db.session.query(
+            Staff.status,
+            db.func.count(Staff.id),
+            db.func.coalesce(db.func.sum(Staff.salary), 0)
+        ).filter(Staff.user_id == user_id).group_by(Staff.status),
+        # Equipos: conteo por estado y mantenimientos próximos/vencidos
+        "equipment": db.session.query(
+            Equipment.status,
+            db.func.count(Equipment.id),
+            db.func.coalesce(db.func.sum(db.case(
+                (Equipment.next_maintenance.between(now, window_end), 1), else_=0
+            )), 0),
+            db.func.coalesce(db.func.sum(db.case(
+                (Equipment.next_maintenance < now, 1), else_=0
+            )), 0)
+        ).filter(Equipment.user_id == user_id).group_by(Equipment.status),
+        # Inventario: total de ítems y cuántos tienen stock bajo (índice parcial)
+        "inventory_total": db.session.query(db.func.count(Inventory.id)).filter(
+            Inventory.user_id == user_id
+        ),
+        "low_stock": db.session.query(db.func.count(Inventory.id)).filter(
+            Inventory.user_id == user_id, Inventory.low_stock()
+        ),
+        "low_stock_items": db.session.query(
+            Inventory.id, Inventory.name, Inventory.quantity, Inventory.min_quantity, Inventory.unit
+        ).filter(
+            Inventory.user_id == user_id, Inventory.low_stock()
+        ).order_by(Inventory.id).limit(LOW_STOCK_PREVIEW),
+    }
+
+
+
+@api.route('/dashboard/overview', methods=['GET'])
+@identity_required
+@etag_versioned('fields', 'inventory', 'equipment', 'staff')
+def get_dashboard_overview():
+    """Resumen agregado del usuario calculado en la base de datos"""
+    try:
+        current_user_id = g.current_user.id
+        now = datetime.utcnow()
+        queries = overview_queries(current_user_id, now)
+        field_rows = queries["fields"].all()
+        staff_rows = queries["staff"].all()
+        equipment_rows = queries["equipment"].all()
+        inventory_total = queries["inventory_total"].scalar()
+        low_stock = queries["low_stock"].scalar()
+        low_stock_items = queries["low_stock_items"].all()
+
+        return jsonify({
+            "fields": {
+                "total": sum(count for _, count, _ in field_rows),
+                "active": sum(count for status, count, _ in field_rows if status == 'Activo'),
+                "total_area": float(sum(area for _, _, area in field_rows)),
+                "by_status": {status or 'Sin estado': count for status, count, _ in field_rows}
+            },
+            "staff": {
+                "total": sum(count for _, count, _ in staff_rows),
+                "active": sum(count for status, count, _ in staff_rows if status == 'Activo'),
+                "by_status": {status or 'Sin estado': count for status, count, _ in staff_rows},
+                "payroll_total": float(sum(salary for _, _, salary in staff_rows)),
+                "active_payroll": float(sum(salary for status, _, salary in staff_rows if status == 'Activo'))
+            },
+            "equipment": {
+                "total": sum(row[1] for row in equipment_rows),
+                "active": sum(row[1] for row in equipment_rows if row[0] == 'Activo'),
+                "by_status": {row[0] or 'Sin estado': row[1] for row in equipment_rows},
+                "maintenance_due": int(sum(row[2] for row in equipment_rows)),
+                "maintenance_overdue": int(sum(row[3] for row in equipment_rows))
+            },
+            "inventory": {
+                "total_items": inventory_total,
+                "low_stock": int(low_stock),
+                "low_stock_items": [{
+                    "id": item.id,
+                    "name": item.name,
+                    "quantity": item.quantity,
+                    "min_quantity": item.min_quantity,
+                    "unit": item.unit
+                } for item in low_stock_items]
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el resumen del dashboard", "error": str(e)}), 500
+
+# ============================
+# BÚSQUEDA
+# ============================
+
+SEARCH_PAGE_SIZE = 20
+
+
+@api.route('/search', methods=['GET'])
+@identity_required
+@etag_versioned('fields', 'inventory', 'equipment', 'staff')
+def search_all():
+    """Búsqueda de texto completo en campos, inventario, equipos y personal"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"msg": "El parámetro q es requerido"}), 400
+    resources = [r.strip() for r in request.args.get('types', '').split(',') if r.strip()]
+    unknown = [r for r in resources if r not in SEARCH_COLUMNS]
+    if unknown:
+        return jsonify({"msg": f"Tipo de búsqueda desconocido: {unknown[0]}", "types": list(SEARCH_COLUMNS)}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', SEARCH_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"msg": "El parámetro limit debe ser un entero"}), 400
+    cursor = request.args.get('cursor')
+    cursor = decode_cursor(cursor) if cursor else None
+    if cursor is not None and len(cursor) != 3:
+        return jsonify({"msg": "Cursor inválido"}), 400
+    try:
+        current_user_id = g.current_user.id
+        rows, next_cursor = search(current_user_id, q, limit, cursor, resources)
+        return jsonify({
+            "results": [{
+                "resource": row.resource,
+                "id": row.id,
+                "title": row.title,
+                "rank": row.rank
+            } for row in rows],
+            "next_cursor": encode_cursor(next_cursor) if next_cursor else None,
+            "limit": limit
+        }), 200
+    except Exception as e:
+        return jsonify({"msg": "Error en la búsqueda", "error": str(e)}), 500
+
+# ============================
+# OPERACIONES EN LOTE
+# ============================
+
+def run_batch(model):
+    """Valida y aplica un lote de creaciones, actualizaciones y borrados"""
+    try:
+        current_user_id = g.current_user.id
+        creates, updates, deletes = validate_batch(model, request.get_json(silent=True), current_user_id)
+        results = apply_batch(model, creates, updates, deletes, current_user_id)
+        return jsonify({"msg": "Lote procesado correctamente", "results": results}), 200
+    except BatchError as e:
+        return jsonify({"msg": e.message, "errors": e.errors}), 400
+    except Exception as e:
+        return jsonify({"msg": "Error al procesar el lote", "error": str(e)}), 500
+
+
+@api.route('/inventory/batch', methods=['POST'])
+@identity_required
+def batch_inventory():
+    """Crear, actualizar y eliminar ítems de inventario en una sola transacción"""
+    return run_batch(Inventory)
+
+
+@api.route('/equipment/batch', methods=['POST'])
+@identity_required
+def batch_equipment():
+    """Crear, actualizar y eliminar equipos en una sola transacción"""
+    return run_batch(Equipment)
+
+
+@api.route('/staff/batch', methods=['POST'])
+@identity_required
+def batch_staff():
+    """Crear, actualizar y eliminar personal en una sola transacción"""
+    return run_batch(Staff)
+
+# ============================
+# IMPORTACIÓN
+# ============================
+
+@api.route('/import/<resource>', methods=['POST'])
+@identity_required
+def import_resource(resource):
+    """Importar inventario o equipos desde un CSV (archivo 'file' o cuerpo text/csv)"""
+    model = RESOURCE_MODELS.get(resource)
+    if model not in IMPORT_VALIDATORS:
+        return jsonify({"msg": f"Recurso no importable: {resource}"}), 404
+    upload = request.files.get('file')
+    # Werkzeug guarda en disco los archivos grandes; leemos del stream sin cargarlo entero
+    stream = upload.stream if upload else request.stream
+    try:
+        current_user_id = g.current_user.id
+        rows = open_csv(stream, delimiter=request.args.get('delimiter'))
+        summary = import_rows(model, rows, current_user_id)
+        return jsonify({"msg": "Importación finalizada", **summary}), 200
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        return jsonify({"msg": "El archivo no es un CSV UTF-8 válido", "error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error al importar", "error": str(e)}), 500
+
+# ============================
+# EXPORTACIÓN
+# ============================
+
+# Filas que se piden a la base de datos (y se envían al cliente) por lote
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_query(model, keys, user_id, filters=()):
+    """Filas de /export/<resource> en orden de id"""
+    return sparse_query(model, keys).filter(model.user_id == user_id, *filters).order_by(model.id)
+
+
+@api.route('/export/<resource>', methods=['GET'])
+@identity_required
+def export_resource(resource):
+    """Exportar todos los registros de un recurso como NDJSON o CSV, en streaming"""
+    model = RESOURCE_MODELS.get(resource)
+    if not model:
+        return jsonify({"msg": f"Recurso no exportable: {resource}"}), 404
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"msg": "El formato debe ser ndjson o csv"}), 400
+    keys = get_fieldset(request.args, model) or list(FIELDSETS[model])
+    filters = get_filters(request.args, model)
+
+    current_user_id = g.current_user.id
+
+    # Cursor del lado del servidor + yield_per: nunca hay más de un lote en memoria
+    query = export_query(model, keys, current_user_id, filters)
+    query = query.execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+
+    def generate_ndjson():
+        chunk = []
+        for row in query:
+            chunk.append(json.dumps(row_to_dict(row), ensure_ascii=False))
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(keys)
+        for i, row in enumerate(query, start=1):
+            writer.writerow(row_to_dict(row).get(key) for key in keys)
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    if export_format == 'csv':
+        generator, mimetype = generate_csv(), 'text/csv'
+    else:
+        generator, mimetype = generate_ndjson(), 'application/x-ndjson'
+
+    filename = f"{resource}-{datetime.utcnow().strftime('%Y%m%d')}.{export_format}"
+    return Response(stream_with_context(generator), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+
 # ============================
 # CLIMA API
 # ============================
+@api.route('/weather/fields', methods=['GET'])
+@identity_required
+def get_fields_weather():
+    """Clima de todos los campos del usuario con coordenadas, por id de campo"""
+    try:
+        current_user_id = g.current_user.id
+
+        fields = db.session.query(Field.id, Field.name, Field.latitude, Field.longitude).filter(
+            Field.user_id == current_user_id
+        ).all()
+        located = [f for f in fields if f.latitude is not None and f.longitude is not None]
+
+        # Los campos de una misma celda comparten pronóstico y consulta
+        forecasts = get_forecasts([(f.latitude, f.longitude) for f in located])
+
+        weather = {}
+        for f in located:
+            data = forecasts.get(grid_key(f.latitude, f.longitude))
+            weather[f.id] = {
+                "field_id": f.id,
+                "name": f.name,
+                "latitude": f.latitude,
+                "longitude": f.longitude,
+                **(summarize_forecast(data) if data is not None else {"error": "Sin datos del clima"})
+            }
+
+        return jsonify({
+            "fields": weather,
+            "without_coordinates": [f.id for f in fields if f.latitude is None or f.longitude is None]
+        }), 200
+
+    except Exception as e:
+        return jsonify({"msg": "Error al obtener el clima de los campos", "error": str(e)}), 500
+
+@api.route('/weather/places', methods=['GET'])
+@identity_required
+def get_weather_places():
+    """Sugerencias de lugares del nomenclátor para el buscador de clima"""
+    query = request.args.get('q', '')
+    return jsonify({"places": gazetteer.search(query)}), 200
+
 @api.route('/weather/<city>', methods=['GET'])
-@jwt_required()
+@identity_required
 def get_weather(city):
     """Obtener el clima actual de una ciudad usando Open-Meteo API con fallback"""
     try:
-        # Lista de ciudades colombianas importantes con coordenadas conocidas
-        colombian_cities = {
-            'boyaca': {'lat': 5.5353, 'lon': -73.3678, 'name': 'Boyacá', 'country': 'Colombia'},
-            'tunja': {'lat': 5.5353, 'lon': -73.3678, 'name': 'Tunja', 'country': 'Colombia'},
-            'bogota': {'lat': 4.7110, 'lon': -74.0721, 'name': 'Bogotá', 'country': 'Colombia'},
-            'medellin': {'lat': 6.2442, 'lon': -75.5812, 'name': 'Medellín', 'country': 'Colombia'},
-            'cali': {'lat': 3.4516, 'lon': -76.5319, 'name': 'Cali', 'country': 'Colombia'},
-            'barranquilla': {'lat': 10.9639, 'lon': -74.7964, 'name': 'Barranquilla', 'country': 'Colombia'},
-            'cartagena': {'lat': 10.3910, 'lon': -75.4794, 'name': 'Cartagena', 'country': 'Colombia'},
-            'bucaramanga': {'lat': 7.1253, 'lon': -73.1198, 'name': 'Bucaramanga', 'country': 'Colombia'},
-            'pereira': {'lat': 4.8133, 'lon': -75.6961, 'name': 'Pereira', 'country': 'Colombia'},
-            'cucuta': {'lat': 7.8939, 'lon': -72.5078, 'name': 'Cúcuta', 'country': 'Colombia'},
-            'ibague': {'lat': 4.4389, 'lon': -75.2322, 'name': 'Ibagué', 'country': 'Colombia'},
-            'villavicencio': {'lat': 4.1505, 'lon': -73.6367, 'name': 'Villavicencio', 'country': 'Colombia'},
-            'valledupar': {'lat': 10.4634, 'lon': -73.2532, 'name': 'Valledupar', 'country': 'Colombia'},
-            'monteria': {'lat': 8.7479, 'lon': -75.8815, 'name': 'Montería', 'country': 'Colombia'},
-            'neiva': {'lat': 2.9273, 'lon': -75.2819, 'name': 'Neiva', 'country': 'Colombia'},
-            'pasto': {'lat': 1.2136, 'lon': -77.2811, 'name': 'Pasto', 'country': 'Colombia'},
-            'riohacha': {'lat': 11.5444, 'lon': -72.9070, 'name': 'Riohacha', 'country': 'Colombia'},
-            'armenia': {'lat': 4.5339, 'lon': -75.6811, 'name': 'Armenia', 'country': 'Colombia'},
-            'popayan': {'lat': 2.4542, 'lon': -76.6147, 'name': 'Popayán', 'country': 'Colombia'},
-            'sincelejo': {'lat': 9.3047, 'lon': -75.3973, 'name': 'Sincelejo', 'country': 'Colombia'}
-        }
-        
-        # Normalizar nombre de ciudad para búsqueda
-        city_lower = city.lower().strip()
-        
-        # Primero intentamos obtener coordenadas de la ciudad con Open-Meteo
-        geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1&language=es&format=json"
-        geo_response = requests.get(geocoding_url)
+        # Primero el nomenclátor offline; el geocodificador (con caché) solo si no está
+        place = gazetteer.lookup(city) or geocode(city)
         
         lat, lon, city_name, country = None, None, None, None
-        
-        # Si Open-Meteo encuentra la ciudad
-        if geo_response.status_code == 200:
-            geo_data = geo_response.json()
-            if geo_data.get('results'):
-                lat = geo_data['results'][0]['latitude']
-                lon = geo_data['results'][0]['longitude']
-                city_name = geo_data['results'][0]['name']
-                country = geo_data['results'][0]['country']
-        
-        # Si no encuentra, intentar con nuestro fallback de ciudades colombianas
-        if lat is None and city_lower in colombian_cities:
-            city_data = colombian_cities[city_lower]
-            lat = city_data['lat']
-            lon = city_data['lon']
-            city_name = city_data['name']
-            country = city_data['country']
-            print(f"Using fallback coordinates for {city}: {lat}, {lon}")
+        if place:
+            lat = place['lat']
+            lon = place['lon']
+            city_name = place['name']
+            country = place['country']
         
         # Si todavía no hay coordenadas, usar Bogotá como último fallback
         if lat is None:
@@ -658,39 +1274,20 @@ def get_weather(city):
             lon = -74.0721
             city_name = city or 'Ubicación'
             country = 'Colombia'
-            print(f"Using Bogotá as final fallback for {city}")
-        
-        # Obtener clima actual
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&daily=temperature_2m_max,temperature_2m_min,precipitation_sum&timezone=auto"
-        weather_response = requests.get(weather_url)
+            logger.info("ciudad no encontrada, se usa Bogotá", extra={"city": city})
         
-        if weather_response.status_code != 200:
+        # Obtener clima actual (con caché por coordenadas)
+        try:
+            weather_data = get_forecast(lat, lon)
+        except ForecastError:
             return jsonify({"msg": "Error al obtener datos del clima"}), 400
-            
-        weather_data = weather_response.json()
-        
-        # Procesar datos del clima
-        current = weather_data.get('current_weather', {})
-        daily = weather_data.get('daily', {})
         
         weather_info = {
             "city": city_name,
             "country": country,
             "latitude": lat,
             "longitude": lon,
-            "current": {
-                "temperature": current.get('temperature'),
-                "windspeed": current.get('windspeed'),
-                "winddirection": current.get('winddirection'),
-                "is_day": current.get('is_day'),
-                "weather_code": current.get('weathercode'),
-                "time": current.get('time')
-            },
-            "daily": {
-                "max_temp": daily.get('temperature_2m_max', [])[0] if daily.get('temperature_2m_max') else None,
-                "min_temp": daily.get('temperature_2m_min', [])[0] if daily.get('temperature_2m_min') else None,
-                "precipitation": daily.get('precipitation_sum', [])[0] if daily.get('precipitation_sum') else None
-            }
+            **summarize_forecast(weather_data)
         }
         
         return jsonify(weather_info), 200
@@ -699,7 +1296,7 @@ def get_weather(city):
         return jsonify({"msg": "Error al obtener el clima", "error": str(e)}), 500
 
 @api.route('/weather/coordinates', methods=['POST'])
-@jwt_required()
+@identity_required
 def get_weather_by_coordinates():
     """Obtener el clima actual usando coordenadas específicas"""
     try:
@@ -710,35 +1307,16 @@ def get_weather_by_coordinates():
         if not lat or not lon:
             return jsonify({"msg": "Latitud y longitud son requeridas"}), 400
             
-        # Obtener clima actual
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&daily=temperature_2m_max,temperature_2m_min,precipitation_sum&timezone=auto"
-        weather_response = requests.get(weather_url)
-        
-        if weather_response.status_code != 200:
+        # Obtener clima actual (con caché por coordenadas)
+        try:
+            weather_data = get_forecast(lat, lon)
+        except ForecastError:
             return jsonify({"msg": "Error al obtener datos del clima"}), 400
-            
-        weather_data = weather_response.json()
-        
-        # Procesar datos del clima
-        current = weather_data.get('current_weather', {})
-        daily = weather_data.get('daily', {})
         
         weather_info = {
             "latitude": lat,
             "longitude": lon,
-            "current": {
-                "temperature": current.get('temperature'),
-                "windspeed": current.get('windspeed'),
-                "winddirection": current.get('winddirection'),
-                "is_day": current.get('is_day'),
-                "weather_code": current.get('weathercode'),
-                "time": current.get('time')
-            },
-            "daily": {
-                "max_temp": daily.get('temperature_2m_max', [])[0] if daily.get('temperature_2m_max') else None,
-                "min_temp": daily.get('temperature_2m_min', [])[0] if daily.get('temperature_2m_min') else None,
-                "precipitation": daily.get('precipitation_sum', [])[0] if daily.get('precipitation_sum') else None
-            }
+            **summarize_forecast(weather_data)
         }
         
         return jsonify(weather_info), 200
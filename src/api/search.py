@@ -0,0 +1,122 @@
+import re
+from sqlalchemy import DDL, event, text
+from .models import db, Field, Inventory, Equipment, Staff
+
+"""
+Búsqueda de texto completo sobre campos, inventario, equipos y personal.
+
+- SQLite: una tabla FTS5 de contenido externo por recurso (rowid = id del
+  registro), con tokenizador unicode61 y remove_diacritics, de modo que
+  "medellin" encuentra "Medellín". Los triggers mantienen el índice al día
+  en cualquier escritura, incluidas las masivas (lotes e importaciones).
+- Postgres: un índice GIN sobre to_tsvector('spanish', ...) en cada tabla;
+  Postgres lo mantiene solo. Sin la extensión unaccent no ignora acentos.
+
+Los resultados se ordenan por relevancia (bm25 / ts_rank) y se paginan con
+un cursor (rank, recurso, id).
+"""
+
+# Recurso -> (modelo, columnas indexadas). La primera columna es el título.
+SEARCH_COLUMNS = {
+    'fields': (Field, ('name', 'crop', 'location')),
+    'inventory': (Inventory, ('name', 'supplier', 'notes')),
+    'equipment': (Equipment, ('name', 'brand', 'model', 'serial_number')),
+    'staff': (Staff, ('name', 'position')),
+}
+
+MAX_TERMS = 8
+
+
+def sqlite_ddl(table, columns):
+    """Tabla FTS5 de contenido externo y triggers que la sincronizan"""
+    fts = f"{table}_search"
+    cols = ', '.join(columns)
+    new = ', '.join(f"new.{column}" for column in columns)
+    old = ', '.join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, user_id UNINDEXED, "
+        f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}, user_id) VALUES (new.id, {new}, new.user_id); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}, user_id) VALUES ('delete', old.id, {old}, old.user_id); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}, user_id) VALUES ('delete', old.id, {old}, old.user_id); "
+        f"INSERT INTO {fts}(rowid, {cols}, user_id) VALUES (new.id, {new}, new.user_id); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def tsvector_sql(columns):
+    return "to_tsvector('spanish', " + " || ' ' || ".join(f"coalesce({column}, '')" for column in columns) + ")"
+
+
+def postgresql_ddl(table, columns):
+    return [f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin ({tsvector_sql(columns)})"]
+
+
+# db.create_all() también crea los índices de búsqueda
+for _model, _columns in SEARCH_COLUMNS.values():
+    _table = _model.__tablename__
+    for _statement in sqlite_ddl(_table, _columns):
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    for _statement in postgresql_ddl(_table, _columns):
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+
+def search_terms(q):
+    """Palabras de la consulta, sin sintaxis de FTS (el usuario no puede inyectar operadores)"""
+    return re.findall(r'\w+', q.lower())[:MAX_TERMS]
+
+
+def search_statement(user_id, q, limit, cursor=None, resources=None):
+    """Sentencia de search() con sus parámetros, o None si q no tiene palabras"""
+    terms = search_terms(q)
+    if not terms:
+        return None
+    dialect = db.session.get_bind().dialect.name
+    resources = resources or list(SEARCH_COLUMNS)
+    params = {"user_id": int(user_id), "limit": limit + 1}
+    selects = []
+    for resource in resources:
+        model, columns = SEARCH_COLUMNS[resource]
+        table = model.__tablename__
+        if dialect == 'sqlite':
+            params["query"] = ' '.join(f'"{term}"*' for term in terms)
+            selects.append(
+                f"SELECT '{resource}' AS resource, rowid AS id, {columns[0]} AS title, "
+                f"bm25({table}_search) AS rank FROM {table}_search "
+                f"WHERE {table}_search MATCH :query AND user_id = :user_id"
+            )
+        else:
+            params["query"] = ' & '.join(f"{term}:*" for term in terms)
+            selects.append(
+                f"SELECT '{resource}' AS resource, id, {columns[0]} AS title, "
+                f"-ts_rank({tsvector_sql(columns)}, to_tsquery('spanish', :query)) AS rank FROM {table} "
+                f"WHERE {tsvector_sql(columns)} @@ to_tsquery('spanish', :query) AND user_id = :user_id"
+            )
+
+    where = ""
+    if cursor:
+        params.update(last_rank=cursor[0], last_resource=cursor[1], last_id=cursor[2])
+        where = "WHERE (rank, resource, id) > (:last_rank, :last_resource, :last_id)"
+    sql = (f"SELECT resource, id, title, rank FROM ({' UNION ALL '.join(selects)}) AS results "
+           f"{where} ORDER BY rank, resource, id LIMIT :limit")
+    return text(sql).bindparams(**params)
+
+
+def search(user_id, q, limit, cursor=None, resources=None):
+    """
+    Busca en los recursos indicados (todos por defecto). Devuelve (filas, next_cursor)
+    donde cada fila tiene resource, id, title y rank (menor = más relevante).
+    """
+    statement = search_statement(user_id, q, limit, cursor, resources)
+    if statement is None:
+        return [], None
+    rows = db.session.execute(statement).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = [rows[-1].rank, rows[-1].resource, rows[-1].id]
+    return rows, next_cursor
@@ -1,4 +1,8 @@
+import base64
+import json
+from datetime import date, datetime
 from flask import jsonify, url_for
+from sqlalchemy import Date, DateTime, and_, or_
 
 class APIException(Exception):
     status_code = 400
@@ -39,3 +43,108 @@ def generate_sitemap(app):
         <p>Start working on your project by following the <a href="https://start.4geeksacademy.com/starters/full-stack" target="_blank">Quick Start</a></p>
         <p>Remember to specify a real endpoint path like: </p>
         <ul style="text-align: left;">"""+links_html+"</ul></div>"
+
+
+# ============================
+# Paginación por cursor (keyset)
+# ============================
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    """Codifica la última clave vista como un cursor opaco"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decodifica un cursor generado por encode_cursor"""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise APIException("Cursor inválido", status_code=400)
+    if not isinstance(values, list):
+        raise APIException("Cursor inválido", status_code=400)
+    return values
+
+
+def get_page_params(args, sort=None):
+    """
+    Devuelve (limit, cursor) si la petición pide paginación, o None para
+    conservar la respuesta completa de siempre (clientes existentes).
+    El cursor se valida aquí contra el orden pedido (ver keyset_page).
+    """
+    if 'limit' not in args and 'cursor' not in args and args.get('paginate', '').lower() not in ('1', 'true'):
+        return None
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise APIException("El parámetro limit debe ser un entero", status_code=400)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = args.get('cursor')
+    if not cursor:
+        return limit, None
+    cursor = decode_cursor(cursor)
+    if len(cursor) != (2 if sort else 1):
+        raise APIException("Cursor inválido para este orden", status_code=400)
+    if sort:
+        cursor[0] = cursor_value(sort[0], cursor[0])
+    return limit, cursor
+
+
+def keyset_query(query, id_column, limit, cursor=None, sort=None):
+    """
+    Aplica paginación keyset: WHERE (orden) > :ultimo ORDER BY ... LIMIT n+1.
+    Sin sort ordena por id; con sort=(columna, descendente) ordena por
+    (columna, id) y el cursor guarda ambos valores. Nunca usa OFFSET, así que
+    cada página cuesta lo mismo sin importar lo lejos que esté.
+    """
+    column, descending = sort if sort else (None, False)
+    if column is None:
+        if cursor:
+            query = query.filter(id_column > cursor[0])
+        query = query.order_by(id_column.asc())
+    else:
+        if cursor:
+            value, last_id = cursor
+            if descending:
+                query = query.filter(or_(column < value, and_(column == value, id_column < last_id)))
+            else:
+                query = query.filter(or_(column > value, and_(column == value, id_column > last_id)))
+        if descending:
+            query = query.order_by(column.desc(), id_column.desc())
+        else:
+            query = query.order_by(column.asc(), id_column.asc())
+    return query.limit(limit + 1)
+
+
+def keyset_page(query, id_column, limit, cursor=None, sort=None):
+    """Ejecuta keyset_query y devuelve (items, next_cursor)"""
+    column = sort[0] if sort else None
+    rows = keyset_query(query, id_column, limit, cursor, sort).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if column is None:
+            next_cursor = encode_cursor([last.id])
+        else:
+            value = getattr(last, column.key)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            next_cursor = encode_cursor([value, last.id])
+    return rows, next_cursor
+
+
+def cursor_value(column, value):
+    """Convierte el valor guardado en el cursor al tipo de la columna"""
+    try:
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Date):
+            return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise APIException("Cursor inválido", status_code=400)
+    return value
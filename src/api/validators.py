@@ -0,0 +1,142 @@
+from datetime import datetime
+
+"""
+Validación y conversión de datos de entrada para inventario, equipos y
+personal, con las mismas reglas que las rutas POST/PUT de routes.py.
+Cada función devuelve un dict listo para insertar/actualizar o lanza
+ValueError con un mensaje para el cliente.
+"""
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def to_float(data, key):
+    try:
+        return float(data[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"El campo {key} debe ser numérico")
+
+
+def to_int(data, key):
+    try:
+        return int(data[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"El campo {key} debe ser un entero")
+
+
+def to_date(data, key):
+    try:
+        return datetime.strptime(str(data[key])[:10], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"El campo {key} debe tener formato YYYY-MM-DD")
+
+
+def to_datetime(data, key):
+    try:
+        return datetime.strptime(str(data[key])[:10], '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"El campo {key} debe tener formato YYYY-MM-DD")
+
+
+def require(data, keys):
+    for key in keys:
+        if is_blank(data.get(key)):
+            raise ValueError(f"El campo {key} es requerido")
+
+
+def require_present(data, keys):
+    """En actualizaciones parciales, los campos requeridos que vienen no pueden quedar vacíos"""
+    require(data, [key for key in keys if key in data])
+
+
+def field_id_of(data):
+    if is_blank(data.get('field_id')):
+        return None
+    return to_int(data, 'field_id')
+
+
+def inventory_values(data, partial=False):
+    """Valores de Inventory a partir de un dict (partial=True para actualizaciones)"""
+    if not isinstance(data, dict):
+        raise ValueError("Cada ítem debe ser un objeto")
+    required = ['name', 'category', 'quantity', 'unit']
+    if not partial:
+        require(data, required)
+        values = {
+            'name': data['name'],
+            'category': data['category'],
+            'quantity': to_float(data, 'quantity'),
+            'unit': data['unit'],
+            'supplier': data.get('supplier'),
+            'min_quantity': None,
+            'notes': data.get('notes'),
+            'field_id': field_id_of(data),
+        }
+    else:
+        require_present(data, required)
+        values = {key: data[key] for key in ('name', 'category', 'unit', 'supplier', 'notes') if key in data}
+        if 'quantity' in data:
+            values['quantity'] = to_float(data, 'quantity')
+        if 'field_id' in data:
+            values['field_id'] = field_id_of(data)
+    if not is_blank(data.get('min_quantity')):
+        values['min_quantity'] = to_float(data, 'min_quantity')
+    return values
+
+
+def equipment_values(data, partial=False):
+    """Valores de Equipment a partir de un dict (partial=True para actualizaciones)"""
+    if not isinstance(data, dict):
+        raise ValueError("Cada equipo debe ser un objeto")
+    if not partial:
+        require(data, ['name'])
+    else:
+        require_present(data, ['name'])
+    keys = ('name', 'type', 'brand', 'model', 'serial_number', 'notes')
+    values = {key: data.get(key) for key in keys if not partial or key in data}
+    if not partial:
+        values['status'] = data.get('status') or 'Activo'
+    elif 'status' in data:
+        values['status'] = data['status']
+    if not is_blank(data.get('year')):
+        values['year'] = to_int(data, 'year')
+    if not is_blank(data.get('purchase_date')):
+        values['purchase_date'] = to_date(data, 'purchase_date')
+    for key in ('last_maintenance', 'next_maintenance'):
+        if not is_blank(data.get(key)):
+            values[key] = to_datetime(data, key)
+    if not partial or 'field_id' in data:
+        values['field_id'] = field_id_of(data)
+    return values
+
+
+def staff_values(data, partial=False):
+    """Valores de Staff a partir de un dict (partial=True para actualizaciones)"""
+    if not isinstance(data, dict):
+        raise ValueError("Cada registro de personal debe ser un objeto")
+    required = ['name', 'email', 'position']
+    if not partial:
+        require(data, required)
+        values = {
+            'name': data['name'],
+            'email': data['email'],
+            'phone': data.get('phone', ''),
+            'position': data['position'],
+            'salary': data.get('salary'),
+            'status': data.get('status', 'Activo'),
+            'notes': data.get('notes', ''),
+            'field_id': field_id_of(data),
+        }
+    else:
+        require_present(data, required)
+        keys = ('name', 'email', 'phone', 'position', 'salary', 'status', 'notes')
+        values = {key: data[key] for key in keys if key in data}
+        if 'field_id' in data:
+            values['field_id'] = field_id_of(data)
+    if 'salary' in values:
+        values['salary'] = None if is_blank(values['salary']) else to_float(values, 'salary')
+    if not is_blank(data.get('hire_date')):
+        values['hire_date'] = to_date(data, 'hire_date')
+    return values
@@ -0,0 +1,168 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+"""
+Cliente HTTP compartido para Open-Meteo (pronóstico y geocodificación).
+
+- Sesión única con conexiones persistentes (keep-alive) y pool por host.
+- Timeouts de conexión y de lectura en todas las llamadas, y un plazo
+  total por llamada que comparten todos sus reintentos.
+- Reintentos acotados ante errores de conexión, 429 y 5xx, con espera
+  exponencial aleatoria (jitter) para no sincronizar a los workers. Un
+  timeout de lectura no se reintenta.
+- Circuit breaker: tras varios intentos fallidos seguidos deja de llamar al servicio
+  durante un tiempo y falla de inmediato, para que las rutas respondan con
+  la caché o con su fallback en lugar de bloquear el worker.
+
+Las URLs se pueden cambiar con OPEN_METEO_FORECAST_URL y
+OPEN_METEO_GEOCODING_URL, por ejemplo para apuntar a un servidor local.
+"""
+
+FORECAST_URL = os.getenv('OPEN_METEO_FORECAST_URL', "https://api.open-meteo.com/v1/forecast")
+GEOCODING_URL = os.getenv('OPEN_METEO_GEOCODING_URL', "https://geocoding-api.open-meteo.com/v1/search")
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 5
+MAX_RETRIES = 2
+# Plazo total de una llamada con sus reintentos. /weather/<city> hace hasta
+# dos llamadas (geocodificación y pronóstico): 2 x 6 s queda muy por debajo
+# de los 30 s del timeout de los workers de gunicorn
+CALL_DEADLINE = 6
+# No se empieza un intento con menos tiempo que este
+MIN_ATTEMPT_SECONDS = 0.5
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 20
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+
+
+class WeatherServiceError(Exception):
+    """El servicio no respondió correctamente"""
+    pass
+
+
+class CircuitOpenError(WeatherServiceError):
+    """El circuito está abierto: no se intenta la llamada"""
+    pass
+
+
+class CircuitBreaker:
+    """Cerrado -> abierto tras failure_threshold fallos seguidos; tras reset_timeout
+    deja pasar una llamada de prueba (semiabierto) que lo cierra o lo vuelve a abrir"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class WeatherClient:
+    def __init__(self, forecast_url=FORECAST_URL, geocoding_url=GEOCODING_URL,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES,
+                 deadline=CALL_DEADLINE, breaker=None):
+        self.forecast_url = forecast_url
+        self.geocoding_url = geocoding_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def forecast(self, params):
+        return self.get_json(self.forecast_url, params)
+
+    def geocode(self, params):
+        return self.get_json(self.geocoding_url, params)
+
+    def get_json(self, url, params):
+        """GET con timeouts, reintentos y circuit breaker; devuelve el JSON de una respuesta 200"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Servicio de clima no disponible temporalmente")
+
+        connect_timeout, read_timeout = self.timeout
+        deadline = time.monotonic() + self.deadline
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            try:
+                response = self.session.get(url, params=params,
+                                            timeout=(min(connect_timeout, remaining), min(read_timeout, remaining)))
+            except requests.ConnectionError as e:
+                # Incluye ConnectTimeout: la petición no llegó al servicio
+                error = WeatherServiceError(str(e))
+            except requests.RequestException as e:
+                # Un ReadTimeout no se reintenta: el servicio ya recibió la
+                # petición y otra espera igual solo alarga el bloqueo del worker
+                self.breaker.record_failure()
+                raise WeatherServiceError(str(e))
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    # Un 4xx es un error de la petición, no del servicio
+                    self.breaker.record_success()
+                    if response.status_code != 200:
+                        raise WeatherServiceError(f"Respuesta {response.status_code} del servicio de clima")
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise WeatherServiceError("Respuesta inválida del servicio de clima")
+                error = WeatherServiceError(f"Respuesta {response.status_code} del servicio de clima")
+
+            # Cada intento fallido cuenta para el breaker, no solo el último
+            self.breaker.record_failure()
+            if attempt == self.max_retries or self.breaker.state != 'closed' or not self._backoff(attempt, deadline):
+                raise error
+
+    def _backoff(self, attempt, deadline):
+        """Espera antes del siguiente intento; False si ya no cabe antes del plazo"""
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        if time.monotonic() + delay + MIN_ATTEMPT_SECONDS >= deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+
+# Cliente compartido por todas las rutas del proceso
+weather_client = WeatherClient()
@@ -6,7 +6,6 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from datetime import timedelta
 from dotenv import load_dotenv
-import logging
 from flask_login import LoginManager
 
 # =====================
@@ -14,44 +13,89 @@ from flask_login import LoginManager
 # =====================
 load_dotenv()
 
-# =====================
-# Logging
-# =====================
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 # =====================
 # Extensiones
 # =====================
 # Importar db desde database.py para evitar circularidad
-from src.api.database import db
+from src.api.database import db, database_url, engine_options, replica_binds, init_replicas
+from src.api.logs import setup_logging, parse_sample_rates
 migrate = Migrate()
 jwt = JWTManager()
 login_manager = LoginManager()
 
 
-def create_app():
+# =====================
+# Perfiles de configuración
+# =====================
+class Config:
+    SECRET_KEY = os.getenv('FLASK_APP_KEY', 'dev-key')
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret')
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
+    # Método y costo del hash de contraseñas (ver flask benchmark-password-hashing)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # DATABASE_URL (Postgres en producción) o el SQLite local
+    SQLALCHEMY_DATABASE_URI = database_url('sqlite:///' + os.path.join(
+        os.path.abspath(os.path.dirname(__file__)),
+        'app.db'
+    ))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Réplicas de lectura opcionales: DATABASE_REPLICA_URLS="url1,url2"
+    SQLALCHEMY_BINDS = replica_binds(os.getenv('DATABASE_REPLICA_URLS'))
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQL en consola solo si se pide explícitamente (SQLALCHEMY_ECHO=1)
+    SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', '0') == '1'
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # Fracción de registros que se escriben por nivel, p. ej. "INFO=0.1,DEBUG=0"
+    LOG_SAMPLE_RATES = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', ''))
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+
+
+class TestingConfig(Config):
+    TESTING = True
+    JWT_SECRET_KEY = 'test-jwt-secret-con-al-menos-32-bytes'
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
+    # Hash barato: los tests no miden seguridad
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    LOG_LEVEL = 'WARNING'
+
+
+class ProductionConfig(Config):
+    SQLALCHEMY_ECHO = False
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_SAMPLE_RATES = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', 'DEBUG=0,INFO=0.1'))
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'test': TestingConfig,
+    'production': ProductionConfig,
+}
+
+
+def create_app(config_name=None):
+    """config_name: development, test o production (por defecto APP_ENV, o production)"""
     app = Flask(__name__)
 
     # =====================
     # Configuración
     # =====================
-    app.config.update(
-        SECRET_KEY=os.getenv('FLASK_APP_KEY', 'dev-key'),
-        JWT_SECRET_KEY=os.getenv('JWT_SECRET_KEY', 'jwt-secret'),
-        JWT_ACCESS_TOKEN_EXPIRES=timedelta(days=1),
-        SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(
-            os.path.abspath(os.path.dirname(__file__)),
-            'app.db'
-        ),
-        SQLALCHEMY_TRACK_MODIFICATIONS=False,
-        SQLALCHEMY_ECHO=True
-    )
+    # Sin APP_ENV se usa production: gunicorn (Procfile, wsgi.py) no lo define
+    # y no debe arrancar con DEBUG
+    config_name = config_name or os.getenv('APP_ENV', 'production')
+    app.config.from_object(CONFIGS[config_name])
+    setup_logging(app.config['LOG_LEVEL'], app.config['LOG_SAMPLE_RATES'])
 
     # =====================
     # Inicializar extensiones
     # =====================
     db.init_app(app)
+    init_replicas(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     login_manager.init_app(app)
@@ -85,6 +129,12 @@ def create_app():
     from src.api.admin import setup_admin
     setup_admin(app)
 
+    # =====================
+    # Comandos CLI
+    # =====================
+    from src.api.commands import setup_commands
+    setup_commands(app)
+
     # =====================
     # Rutas prueba
     # =====================
@@ -110,7 +160,8 @@ def create_app():
 # =====================
 # Crear app
 # =====================
-app = create_app()
+# `python src/app.py` es el servidor de desarrollo: ahí el perfil por defecto es development
+app = create_app(os.getenv('APP_ENV', 'development') if __name__ == '__main__' else None)
 
 
 # =====================
@@ -124,4 +175,4 @@ def load_user(user_id):
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 3001))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=app.debug)
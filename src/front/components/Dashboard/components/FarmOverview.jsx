@@ -37,43 +37,35 @@ const FarmOverview = () => {
         'Authorization': `Bearer ${token}`
       };
 
-      // Obtener datos de campos
+      // Resumen agregado calculado en el servidor
+      const overviewResponse = await fetch(`${API_URL}/api/dashboard/overview`, { headers });
+      if (!overviewResponse.ok) {
+        throw new Error('Error al obtener el resumen del dashboard');
+      }
+      const overview = await overviewResponse.json();
+
+      // Los campos se siguen necesitando para el clima y las actividades
       const fieldsResponse = await fetch(`${API_URL}/api/fields`, { headers });
       const fieldsData = fieldsResponse.ok ? await fieldsResponse.json() : { fields: [] };
 
-      // Obtener datos de personal
-      const staffResponse = await fetch(`${API_URL}/api/staff`, { headers });
-      const staffData = staffResponse.ok ? await staffResponse.json() : [];
-
-      // Obtener datos de equipos
-      const equipmentResponse = await fetch(`${API_URL}/api/equipment`, { headers });
-      const equipmentData = equipmentResponse.ok ? await equipmentResponse.json() : [];
-
-      // Obtener datos de inventario
-      const inventoryResponse = await fetch(`${API_URL}/api/inventory`, { headers });
-      const inventoryData = inventoryResponse.ok ? await inventoryResponse.json() : [];
-      const inventoryArray = Array.isArray(inventoryData) ? inventoryData : [];
-
       // Procesar estadísticas
       const processedStats = {
         fields: {
-          total: fieldsData.fields?.length || 0,
-          active: fieldsData.fields?.filter(f => f.status === 'Activo').length || 0,
-          totalArea: fieldsData.fields?.reduce((sum, f) => sum + (parseFloat(f.area) || 0), 0) || 0
+          total: overview.fields.total,
+          active: overview.fields.active,
+          totalArea: overview.fields.total_area
         },
         staff: {
-          total: staffData.length || 0,
-          active: staffData.filter(s => s.status === 'Activo').length || 0
+          total: overview.staff.total,
+          active: overview.staff.active
         },
         equipment: {
-          total: equipmentData.length || 0,
-          active: equipmentData.filter(e => e.status === 'Activo').length || 0
+          total: overview.equipment.total,
+          active: overview.equipment.active
         },
         inventory: {
-          totalItems: inventoryArray.length || 0,
-          lowStock: inventoryArray.filter(item =>
-            item.min_quantity && parseFloat(item.quantity) <= parseFloat(item.min_quantity)
-          ).length || 0
+          totalItems: overview.inventory.total_items,
+          lowStock: overview.inventory.low_stock
         }
       };
 
@@ -98,9 +90,7 @@ const FarmOverview = () => {
           description: field.next_action,
           dueDate: 'Próximamente'
         })) || [],
-        ...inventoryArray.filter(item =>
-          item.min_quantity && parseFloat(item.quantity) <= parseFloat(item.min_quantity)
-        ).map(item => ({
+        ...overview.inventory.low_stock_items.map(item => ({
           id: `inventory_${item.id}`,
           type: 'inventory',
           priority: 'high',
@@ -0,0 +1,75 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from src.app import create_app
+from src.api.database import db
+from src.api.models import User, Field, Inventory, Equipment, Staff
+from src.api import identity
+
+
+@pytest.fixture
+def app():
+    app = create_app('test')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    identity._status.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(email='admin@farm.co', first_name='Ana', last_name='Gómez', role='admin')
+    user.set_password('secreto')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+
+@pytest.fixture
+def seed(user):
+    """seed(n): n registros de inventario, equipos y personal repartidos en dos campos"""
+    def seed(n):
+        fields = [Field(name=f'Campo {i}', crop='Café', area=10, user_id=user.id) for i in range(2)]
+        db.session.add_all(fields)
+        db.session.flush()
+        for i in range(n):
+            field = fields[i % 2]
+            db.session.add(Inventory(name=f'Insumo {i}', quantity=i, unit='kg', category='Semillas',
+                                     user_id=user.id, field_id=field.id))
+            db.session.add(Equipment(name=f'Equipo {i}', user_id=user.id, field_id=field.id))
+            db.session.add(Staff(name=f'Persona {i}', email=f'p{i}@farm.co', position='Operario',
+                                 user_id=user.id, field_id=field.id))
+            db.session.add(User(email=f'u{i}@farm.co', first_name='U', last_name=str(i), password='x'))
+        db.session.commit()
+        db.session.expire_all()
+    return seed
+
+
+@pytest.fixture
+def count_queries(app):
+    """count_queries(fn): número de sentencias SQL que ejecuta fn()"""
+    def count_queries(fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return len(statements), result
+    return count_queries
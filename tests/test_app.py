@@ -0,0 +1,16 @@
+from src.app import create_app
+
+
+def test_default_profile_is_production(monkeypatch):
+    monkeypatch.delenv('APP_ENV', raising=False)
+    app = create_app()
+    assert app.debug is False
+    assert app.config['LOG_LEVEL'] != 'DEBUG'
+
+    @app.route('/falla')
+    def falla():
+        raise RuntimeError('boom')
+
+    response = app.test_client().get('/falla')
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "Error interno"}
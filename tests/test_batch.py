@@ -0,0 +1,27 @@
+import pytest
+from src.api.database import db
+from src.api.models import Staff
+
+
+@pytest.mark.parametrize('url, item', [
+    ('/api/inventory/batch', {'name': None}),
+    ('/api/inventory/batch', {'category': '  '}),
+    ('/api/equipment/batch', {'name': ''}),
+    ('/api/staff/batch', {'email': None}),
+    ('/api/staff/batch', {'position': ''}),
+])
+def test_partial_update_cannot_blank_required_fields(client, auth_headers, seed, url, item):
+    seed(2)
+    response = client.post(url, json={'update': [{'id': 1, **item}]}, headers=auth_headers)
+
+    assert response.status_code == 400
+    key = next(iter(item))
+    assert response.json['errors'] == [{'index': 0, 'op': 'update', 'error': f'El campo {key} es requerido'}]
+
+
+def test_partial_update_keeps_other_fields(client, auth_headers, seed):
+    seed(2)
+    response = client.post('/api/staff/batch', json={'update': [{'id': 1, 'phone': '300'}]}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert db.session.get(Staff, 1).phone == '300'
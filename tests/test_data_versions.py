@@ -0,0 +1,23 @@
+from sqlalchemy import text
+from src.api.database import db
+from src.api.models import DataVersion, Field, get_data_versions, increment_data_versions
+
+
+def test_deleting_a_user_removes_its_data_versions(app, user, seed):
+    seed(3)
+    assert DataVersion.query.filter_by(user_id=user.id).count() > 0
+
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+    db.session.delete(user)
+    db.session.commit()
+
+    assert DataVersion.query.count() == 0
+    assert Field.query.count() == 0
+
+
+def test_increment_is_an_upsert(app, user):
+    with db.engine.begin() as connection:
+        increment_data_versions(connection, {(user.id, 'fields'), (user.id, 'staff')})
+        increment_data_versions(connection, {(user.id, 'fields')})
+
+    assert get_data_versions(user.id, ['fields', 'staff', 'inventory']) == [2, 1, 0]
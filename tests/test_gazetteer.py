@@ -0,0 +1,24 @@
+import pytest
+from src.api.gazetteer import gazetteer
+
+
+@pytest.mark.parametrize('query', ['Santa Rosa', 'San Vicente', 'Puerto', 'San', 'Medellín, Caldas'])
+def test_lookup_rejects_partial_names(query):
+    assert gazetteer.lookup(query) is None
+
+
+@pytest.mark.parametrize('query, name, department', [
+    ('Bogota', 'Bogotá', 'Bogotá D.C.'),
+    ('  medellin ', 'Medellín', 'Antioquia'),
+    ('Ibage', 'Ibagué', 'Tolima'),
+    ('Caldas, Antioquia', 'Caldas', 'Antioquia'),
+    ('Caldas, Caldas', 'Caldas', 'Caldas'),
+])
+def test_lookup_accepts_exact_and_close_names(query, name, department):
+    place = gazetteer.lookup(query)
+    assert (place['name'], place['department']) == (name, department)
+
+
+def test_search_keeps_prefix_matches():
+    names = [place['name'] for place in gazetteer.search('Santa Rosa')]
+    assert names == ['Santa Rosa de Cabal']
@@ -0,0 +1,21 @@
+from src.api.database import db
+from src.api.geo import fields_in_bbox
+from src.api.models import User, Field
+
+
+def test_rtree_is_recreated_with_the_schema(app, user):
+    db.session.add(Field(name='Lote viejo', latitude=4.6, longitude=-74.1, user_id=user.id))
+    db.session.commit()
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    owner = User(email='otro@farm.co', first_name='Luis', last_name='Pérez', password='x')
+    db.session.add(owner)
+    db.session.flush()
+    field = Field(name='Lote nuevo', latitude=6.2, longitude=-75.6, user_id=owner.id)
+    db.session.add(field)
+    db.session.commit()
+    assert [f.id for f in fields_in_bbox(owner.id, 6.0, -76.0, 6.5, -75.0)] == [field.id]
+    assert fields_in_bbox(owner.id, 4.0, -75.0, 5.0, -74.0) == []
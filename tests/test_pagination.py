@@ -0,0 +1,32 @@
+import pytest
+from src.api.models import Inventory
+
+
+def all_pages(client, auth_headers, url):
+    ids, cursor = [], None
+    for _ in range(20):
+        query = f'{url}&cursor={cursor}' if cursor else url
+        response = client.get(query, headers=auth_headers)
+        assert response.status_code == 200
+        ids += [item['id'] for item in response.get_json()['inventory']]
+        cursor = response.get_json()['next_cursor']
+        if cursor is None:
+            return ids
+    pytest.fail('La paginación no termina')
+
+
+@pytest.mark.parametrize('sort', ['updated_at', '-updated_at', 'name', '-id'])
+def test_keyset_pages_rows_created_in_the_same_second(client, auth_headers, seed, sort):
+    # seed inserta todo en un solo commit: los updated_at caen en el mismo segundo
+    seed(7)
+    ids = all_pages(client, auth_headers, f'/api/inventory?limit=2&sort={sort}')
+    assert sorted(ids) == [item.id for item in Inventory.query.order_by(Inventory.id)]
+
+
+def test_keyset_pages_after_an_update(client, auth_headers, seed):
+    seed(5)
+    response = client.put('/api/inventory/2', json={'quantity': 50}, headers=auth_headers)
+    assert response.status_code == 200
+    ids = all_pages(client, auth_headers, '/api/inventory?limit=2&sort=-updated_at')
+    assert ids[0] == 2
+    assert sorted(ids) == [1, 2, 3, 4, 5]
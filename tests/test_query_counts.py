@@ -0,0 +1,22 @@
+import pytest
+
+# Consultas por petición, independientes del número de filas:
+# versión de datos (ETag) + listado con su campo en la misma consulta
+EXPECTED_QUERIES = {
+    '/api/inventory': 2,
+    '/api/equipment': 2,
+    '/api/staff': 2,
+    '/api/fields': 2,
+    # Rol del usuario (caché de identidad) + listado
+    '/api/users': 2,
+}
+
+
+@pytest.mark.parametrize('url', sorted(EXPECTED_QUERIES))
+@pytest.mark.parametrize('rows', [3, 12])
+def test_list_endpoint_query_count(client, auth_headers, seed, count_queries, url, rows):
+    seed(rows)
+    count, response = count_queries(lambda: client.get(url, headers=auth_headers))
+
+    assert response.status_code == 200
+    assert count == EXPECTED_QUERIES[url]
@@ -0,0 +1,14 @@
+def test_check_query_plans_passes(app):
+    result = app.test_cli_runner().invoke(args=['check-query-plans'])
+    assert result.exit_code == 0, result.output
+    assert 'FAIL' not in result.output
+    for route in ('GET (ETag) data_version', 'GET /api/inventory?limit', 'GET /api/staff?sort=-updated_at&limit',
+                  'GET /api/search', 'GET /api/fields/nearby', 'GET /api/export/inventory',
+                  'GET /api/dashboard/overview (low_stock_items)'):
+        assert f'OK   {route}\n' in result.output
+
+
+def test_list_plans_include_the_field_join(app):
+    result = app.test_cli_runner().invoke(args=['check-query-plans'])
+    plan = result.output.split('OK   GET /api/inventory\n')[1].split('OK   ')[0]
+    assert 'field' in plan and 'LEFT-JOIN' in plan
@@ -0,0 +1,8 @@
+from src.api.database import RYW_COOKIE
+
+
+def test_no_read_primary_cookie_without_replicas(client, auth_headers, user):
+    response = client.post('/api/inventory', headers=auth_headers,
+                           json={'name': 'Urea', 'category': 'Fertilizantes', 'quantity': 5, 'unit': 'kg'})
+    assert response.status_code == 201
+    assert RYW_COOKIE not in response.headers.get('Set-Cookie', '')
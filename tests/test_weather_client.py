@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.api.weather_client import (CircuitBreaker, CircuitOpenError, WeatherClient,
+                                    WeatherServiceError, weather_client)
+
+
+class StubServer:
+    """Servidor HTTP local que responde con status y body tras esperar delay segundos"""
+
+    def __init__(self, status=200, body=None, delay=0):
+        self.status, self.body, self.delay = status, body or {}, delay
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                payload = json.dumps(stub.body).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        servers.append(StubServer(**kwargs))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
+
+
+def make_client(url, threshold=5):
+    return WeatherClient(forecast_url=url, geocoding_url=url, timeout=(0.5, 0.3),
+                         deadline=1, breaker=CircuitBreaker(failure_threshold=threshold))
+
+
+def test_returns_json(stub):
+    server = stub(body={'ok': True})
+    assert make_client(server.url).forecast({}) == {'ok': True}
+
+
+def test_read_timeout_is_not_retried(stub):
+    server = stub(delay=1)
+    client = make_client(server.url)
+    started = time.monotonic()
+    with pytest.raises(WeatherServiceError):
+        client.forecast({})
+    assert time.monotonic() - started < 0.8
+    assert server.hits == 1
+    assert client.breaker.failures == 1
+
+
+def test_every_failed_attempt_counts_for_the_breaker(stub):
+    server = stub(status=503)
+    client = make_client(server.url, threshold=3)
+    with pytest.raises(WeatherServiceError):
+        client.forecast({})
+    assert server.hits == 3
+    assert client.breaker.state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        client.forecast({})
+    assert server.hits == 3
+
+
+def test_retries_share_the_deadline(stub):
+    server = stub(status=503)
+    client = WeatherClient(forecast_url=server.url, timeout=(0.5, 0.3), max_retries=50,
+                           deadline=1, breaker=CircuitBreaker(failure_threshold=100))
+    started = time.monotonic()
+    with pytest.raises(WeatherServiceError):
+        client.forecast({})
+    assert time.monotonic() - started < 1.5
+
+
+def test_weather_route_is_bounded_by_the_deadlines(client, auth_headers, stub, monkeypatch):
+    server = stub(delay=1)
+    monkeypatch.setattr(weather_client, 'forecast_url', server.url)
+    monkeypatch.setattr(weather_client, 'geocoding_url', server.url)
+    monkeypatch.setattr(weather_client, 'timeout', (0.5, 0.3))
+    monkeypatch.setattr(weather_client, 'deadline', 1)
+    monkeypatch.setattr(weather_client, 'breaker', CircuitBreaker())
+
+    started = time.monotonic()
+    response = client.get('/api/weather/Lugar que no existe', headers=auth_headers)
+    # Geocodificación y pronóstico fallan una vez cada uno, sin reintentos
+    assert time.monotonic() - started < 1.5
+    assert server.hits == 2
+    assert response.status_code == 400